@@ -83,6 +83,12 @@ class Colmto(object):
             '--output-hdf5-file', dest='results_hdf5_file', type=Path,
             default=None, help='target HDF5 file results will be written to'
         )
+        l_parser.add_argument(
+            '--hdf5-compression', dest='hdf5_compression', type=str,
+            choices=tuple(colmto.sumo.sumosim.HDF5_COMPRESSION), default='lzf',
+            help='compression of HDF5 results: gzip level 9 with fletcher32 checksums (as before), '
+                 'gzip level 1, lzf (fast, default) or none'
+        )
         l_parser.add_argument(
             '--scenarios', dest='scenarios', type=str, nargs='*',
             default=None
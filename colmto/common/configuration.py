@@ -72,7 +72,8 @@ _DEFAULT_CONFIG_RUN = {
         'enabled': True,
         'gui-delay': 200,
         'headless': True,
-        'port': 8873
+        'port': 8873,
+        'workers': 1    # number of runs to generate/execute in parallel (headless only), doesn't change vehicle speeds
     },
     'vehiclespersecond': {
         'enabled': False,
@@ -28,10 +28,34 @@ from collections import namedtuple
 from dataclasses import dataclass
 import typing
 import enum
-import matplotlib.pyplot as plt
+import functools
+import operator
 import numpy
 import pandas
 
+# PRNGs of vehicle start times, random initial sorting and vehicle dispositions
+_DISTRIBUTION_PRNG = numpy.random.default_rng()
+_INITIALSORTING_PRNG = numpy.random.default_rng()
+_VEHICLEDISPOSITION_PRNG = numpy.random.default_rng()
+
+# sort key of vehicles by maximum speed
+_SPEED_MAX = operator.attrgetter('speed_max')
+
+
+@functools.lru_cache(maxsize=None)
+def _colourmap(name: str, lut: int):
+    '''
+    Resampled matplotlib colourmap, created once per name and number of entries.
+    pyplot only gets imported here, as importing it takes its time.
+
+    :param name: colourmap name
+    :param lut: number of entries
+    :return: colourmap
+    '''
+    import matplotlib.pyplot as plt  # pylint: disable=import-outside-toplevel
+    return plt.get_cmap(name=name, lut=lut)
+
+
 @dataclass(frozen=True)
 class Colour:
     '''
@@ -52,6 +76,13 @@ class Colour:
         '''
         return iter((self.red, self.green, self.blue, self.alpha))
 
+    def __reduce__(self):
+        '''
+        Pickle via constructor, as frozen data classes with slots can't restore their state by attribute assignment.
+        :return: class and constructor arguments
+        '''
+        return self.__class__, tuple(self)
+
     def __mul__(self, value):
         '''
         Scalars can be attribute-wise multiplied to a Colour.
@@ -79,17 +110,38 @@ class Colour:
         :return: Colour
 
         '''
-        return Colour(*plt.get_cmap(name=name, lut=int(max_value))(int(value)))
+        return Colour(*_colourmap(name, int(max_value))(int(value)))
 
-    def as_tuple(self) -> typing.Tuple[float, float, float, float]:
+    @staticmethod
+    def map_all(name: str, max_value: int, values: typing.Iterable[int], scale: float = 1.) -> typing.List[Colour]:
+        '''
+        Map many values to colours like `map`, but with one colourmap call for all values
+
+        :param name: colourmap name (needs to be supported by matplotlib, e.g. plasma)
+        :param max_value: maximum value, needed for scaling
+        :param values: values on scale
+        :param scale: scalar the colour channels get multiplied with, e.g. 255. for byte sized channels
+        :return: list of Colours
+
+        '''
+        return [
+            Colour(*i_rgba)
+            for i_rgba in (
+                _colourmap(name, int(max_value))(numpy.fromiter(values, dtype=int)) * scale
+            ).tolist()
+        ]
+
+    def as_tuple(self) -> typing.Tuple[int, int, int, int]:
         '''
         Return indexable tuple for passing it via TraCI to SUMO.
+        Channels are truncated to int, as TraCI transmits them as unsigned bytes
+        (and libsumo does not accept floats at all).
 
         :return: tuple of colour channels
 
         '''
 
-        return (self.red, self.green, self.blue, self.alpha)
+        return (int(self.red), int(self.green), int(self.blue), int(self.alpha))
 
 
 @dataclass
@@ -191,6 +243,13 @@ class Range:
         '''
         return iter((self.min, self.max))
 
+    def __reduce__(self):
+        '''
+        Pickle via constructor, as frozen data classes with slots can't restore their state by attribute assignment.
+        :return: class and constructor arguments
+        '''
+        return self.__class__, tuple(self)
+
     def contains(self, value: float) -> bool:
         '''
         Checks whether value lies between min and max (including).
@@ -253,7 +312,6 @@ class Distribution(enum.Enum):
 
     LINEAR = enum.auto()
     POISSON = enum.auto()
-    _prng = numpy.random.RandomState()  # pylint: disable=no-member
 
     def next_timestep(self, lamb: float, prev_start_time: float) -> float:
         r'''
@@ -276,11 +334,38 @@ class Distribution(enum.Enum):
         '''
 
         if self is Distribution.POISSON:
-            return prev_start_time + self._prng.value.exponential(scale=1/lamb)
+            return prev_start_time + _DISTRIBUTION_PRNG.exponential(scale=1/lamb)
 
         assert self is Distribution.LINEAR
         return prev_start_time + 1 / lamb # i.e. Distribution.LINEAR
 
+    def timesteps(self, lamb: float, count: int, start_time: float = 0.) -> numpy.ndarray:
+        r'''
+        Calculate `count` consecutive time steps at once, i.e. the same as calling `next_timestep` `count` times
+        with the previous result, but with one vectorised draw instead of one per time step.
+
+        :param lamb: lambda
+        :type lamb: float
+        :param count: number of time steps
+        :type count: int
+        :param start_time: start time preceding the first time step
+        :type start_time: float
+        :return: numpy array of start times
+
+        '''
+
+        # accumulate in place, i.e. only one array of `count` time steps gets allocated
+        if self is Distribution.POISSON:
+            l_timesteps = _DISTRIBUTION_PRNG.exponential(scale=1/lamb, size=count)
+            numpy.cumsum(l_timesteps, out=l_timesteps)
+        else:
+            assert self is Distribution.LINEAR
+            l_timesteps = numpy.arange(1, count + 1, dtype=numpy.float64)
+            l_timesteps /= lamb
+
+        l_timesteps += start_time
+        return l_timesteps
+
 
 @enum.unique
 class InitialSorting(enum.Enum):
@@ -292,7 +377,6 @@ class InitialSorting(enum.Enum):
     BEST = enum.auto()
     RANDOM = enum.auto()
     WORST = enum.auto()
-    _prng = numpy.random.RandomState()  # pylint: disable=no-member
 
     def order(self, vehicles: typing.List['SUMOVehicle']):
         '''
@@ -303,15 +387,16 @@ class InitialSorting(enum.Enum):
 
         '''
 
-        if self is InitialSorting.BEST:
-            vehicles.sort(key=lambda i_v: i_v.speed_max, reverse=True)
-        elif self is InitialSorting.RANDOM:
-            self._prng.value.shuffle(vehicles)
-        elif self is InitialSorting._prng:
-            raise KeyError('Can\'t order vehicles on prng')
-        else:
-            assert self is InitialSorting.WORST
-            vehicles.sort(key=lambda i_v: i_v.speed_max)
+        if self is InitialSorting.RANDOM:
+            # shuffle an index vector and rebuild the list once instead of swapping list items one by one
+            vehicles[:] = [vehicles[i] for i in _INITIALSORTING_PRNG.permutation(len(vehicles)).tolist()]
+            return
+
+        assert self in (InitialSorting.BEST, InitialSorting.WORST)
+        # stable sort over an array of maximum speeds, i.e. vehicles with equal speeds keep their relative order
+        l_speeds = numpy.fromiter(map(_SPEED_MAX, vehicles), dtype=numpy.float64, count=len(vehicles))
+        l_order = numpy.argsort(-l_speeds if self is InitialSorting.BEST else l_speeds, kind='stable')
+        vehicles[:] = [vehicles[i] for i in l_order.tolist()]
 
 
 @enum.unique
@@ -480,7 +565,6 @@ class VehicleDisposition(enum.Enum):
 
     COOPERATIVE = 'cooperative'
     UNCOOPERATIVE = 'uncooperative'
-    _prng = numpy.random.RandomState()  # pylint: disable=no-member
 
     @staticmethod
     def choose(cooperation_probability: float = 0.5) -> VehicleDisposition:
@@ -492,7 +576,7 @@ class VehicleDisposition(enum.Enum):
 
         '''
 
-        return VehicleDisposition._prng.value.choice(
+        return _VEHICLEDISPOSITION_PRNG.choice(
             (VehicleDisposition.COOPERATIVE, VehicleDisposition.UNCOOPERATIVE),
             p=(cooperation_probability, 1-cooperation_probability)
         )
@@ -24,24 +24,46 @@
 '''I/O module'''
 # pylint: disable=no-member
 
+import copy
 import csv
 import gzip
+import typing
 from pathlib import Path
 
 import json
+import logging
+import os
 import numpy
-
-try:
-    from yaml import CSafeLoader as SafeLoader, CSafeDumper as SafeDumper
-except ImportError:  # pragma: no cover
-    from yaml import SafeLoader, SafeDumper
-
 import yaml
 
 import h5py
 
 import colmto.common.log
 
+# libyaml based loader/dumper are about 10x faster than the pure Python ones,
+# COLMTO_FORCE_PYYAML=1 forces the latter, e.g. for reproducible benchmarks
+_FORCE_PYYAML = os.environ.get('COLMTO_FORCE_PYYAML') == '1'
+
+if _FORCE_PYYAML:
+    SafeLoader, SafeDumper = yaml.SafeLoader, yaml.SafeDumper
+else:
+    # PyYAML only provides the libyaml based classes if it was built with libyaml
+    SafeLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+    SafeDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+if SafeLoader is yaml.SafeLoader and not _FORCE_PYYAML:  # pragma: no cover
+    # plain logger, as colmto.common.log.logger would attach handlers and create the log file at import time
+    logging.getLogger(__name__).warning(
+        'yaml.CSafeLoader unavailable; install libyaml for ~10x faster config parsing (see PyYAML docs)'
+    )
+
+# parsed yaml files: absolute path -> (mtime in ns, size, data), i.e. one entry per file,
+# shared by all readers, as each Configuration instance reads the same configuration files again
+_YAML_CACHE = {}
+
+# dataset creation arguments which only apply to chunked, i.e. non-scalar datasets
+_HDF5_FILTER_KWARGS = frozenset(('compression', 'compression_opts', 'fletcher32', 'chunks'))
+
 
 class Reader(object):  # pylint: disable=too-few-public-methods
     '''Read xml, json and yaml files.'''
@@ -57,13 +79,26 @@ class Reader(object):  # pylint: disable=too-few-public-methods
         '''
         Reads yaml file and returns dictionary.
         If filename ends with .gz treat file as gzipped yaml.
+        Files are only parsed again if their modification time or size changed since the last read,
+        otherwise a copy of the previously parsed data is returned.
         '''
         self._log.debug('Reading %s', filename)
 
-        if Path(filename).suffix.lower() == '.gz':
-            return yaml.load(gzip.GzipFile(filename, 'r'), Loader=SafeLoader)
+        l_path = Path(filename).resolve()
+        l_stat = l_path.stat()
+        l_cached = _YAML_CACHE.get(l_path)
+
+        if l_cached is None or l_cached[:2] != (l_stat.st_mtime_ns, l_stat.st_size):
+            # binary streams go to libyaml's UTF-8 scanner directly, without decoding them in Python first
+            with gzip.open(filename, 'rb') if Path(filename).suffix.lower() == '.gz' \
+                    else open(filename, mode='rb') as f_yaml:
+                l_data = yaml.load(f_yaml, Loader=SafeLoader)
+            l_cached = _YAML_CACHE[l_path] = (l_stat.st_mtime_ns, l_stat.st_size, l_data)
+        else:
+            self._log.debug('Using previously parsed %s', filename)
 
-        return yaml.load(open(filename), Loader=SafeLoader)
+        # callers modify their configuration, hence never hand out the cached data itself
+        return copy.deepcopy(l_cached[2])
 
 
 class Writer(object):
@@ -108,16 +143,29 @@ class Writer(object):
         '''Write row dictionary with provided fieldnames as csv with headers.'''
 
         self._log.debug('Writing %s', filename)
-        with open(filename, 'w') as f_csv:
+        # newline='' leaves the csv module's line terminators untranslated (see csv docs)
+        with open(filename, 'w', newline='') as f_csv:
             csv_writer = csv.DictWriter(f_csv, fieldnames=fieldnames)
             csv_writer.writeheader()
             csv_writer.writerows(rowdict)
 
-    def write_hdf5(self, object_dict: dict, hdf5_file: str, hdf5_base_path: str, **kwargs):
+    @staticmethod
+    def open_hdf5(hdf5_file: typing.Union[str, Path]) -> h5py.File:
+        '''
+        Open HDF5 file for appending, e.g. to pass it to several `write_hdf5` calls without reopening it each time.
+
+        :param hdf5_file: The file name
+        :return: HDF5 file, to be closed by caller (supports with statement)
+        '''
+
+        return h5py.File(hdf5_file, mode='a')
+
+    def write_hdf5(self, object_dict: dict, hdf5_file: typing.Union[str, Path, h5py.File], hdf5_base_path: str,
+                   **kwargs):
         r'''
         Write an object to a specific path into an open file, identified by fileid
 
-        :param hdf5_file: The file name
+        :param hdf5_file: The file name, or a HDF5 file already opened by `open_hdf5`, which is kept open
         :param hdf5_base_path: Destination path in HDF5 structure, will be created if not existent.
         :param object_dict: Object(s) to be stored in a named dictionary structure
             ([name] -> str|int|float|list|numpy)
@@ -130,63 +178,78 @@ class Writer(object):
         if not isinstance(object_dict, dict):
             raise TypeError('objectdict is not a dictionary')
 
+        if isinstance(hdf5_file, h5py.File):
+            self._write_hdf5_group(object_dict, hdf5_file, hdf5_base_path, **kwargs)
+            return
+
         with h5py.File(hdf5_file, mode='a') as f_hdf5:
+            self._write_hdf5_group(object_dict, f_hdf5, hdf5_base_path, **kwargs)
 
-            # create group if it doesn't exist
-            l_group = f_hdf5[hdf5_base_path] \
-                if hdf5_base_path in f_hdf5 else f_hdf5.create_group(hdf5_base_path)
+    def _write_hdf5_group(self, object_dict: dict, f_hdf5: h5py.File, hdf5_base_path: str, **kwargs):
+        r'''
+        Write an object to a specific path into an open HDF5 file (see `write_hdf5`).
 
-            # add datasets for each element of objectdict,
-            # if they already exist by name, overwrite them
-            for i_path, i_object_value in Writer._flatten_object_dict(object_dict).items():
+        :param object_dict: Object(s) to be stored in a named dictionary structure
+        :param f_hdf5: open HDF5 file
+        :param hdf5_base_path: Destination path in HDF5 structure, will be created if not existent.
+        :param \*\*kwargs: Optional arguments passed to create_dataset
+        '''
 
-                # remove filters if we have a scalar object, i.e. string, int, float
-                if isinstance(
+        # create group if it doesn't exist
+        l_group = f_hdf5[hdf5_base_path] \
+            if hdf5_base_path in f_hdf5 else f_hdf5.create_group(hdf5_base_path)
+
+        # add datasets for each element of objectdict,
+        # if they already exist by name, overwrite them
+        for i_path, i_object_value in Writer._flatten_object_dict(object_dict).items():
+
+            # remove filters if we have a scalar object, i.e. string, int, float,
+            # without dropping them for the remaining objects
+            l_kwargs = {
+                i_key: i_value for i_key, i_value in kwargs.items() if i_key not in _HDF5_FILTER_KWARGS
+            } if isinstance(
+                i_object_value.get('value'),
+                (str, int, float, numpy.str_, numpy.int_, numpy.float_)
+            ) else kwargs
+
+            if i_path in l_group:
+                # remove previous object by i_path id and add the new one
+                self._log.debug('removing previous path %s', i_path)
+                del l_group[i_path]
+
+            # # If object is a pandas.DataFrame, write it to a separate hdf5 file (f_hdf5 with '_pandas' suffix) to avoid interfering with f_hdf5.
+            # # The DataFrame itself will also be stored in f_hdf5, but converted to a numpy array.
+            # if isinstance(i_object_value.get('value'), pandas.DataFrame):
+            #     i_object_value.get('value').to_hdf(
+            #         f'{Path(f_hdf5.filename).parent}/{Path(f_hdf5.filename).stem}_pandas{Path(f_hdf5.filename).suffix}',
+            #         f'/{hdf5_base_path}/{i_path}',
+            #         complib=kwargs.get('compression') if kwargs.get('compression') in ('zlib', 'lzo', 'bzip2', 'blosc') else 'zlib',
+            #         complevel=kwargs.get('compression_opts'),
+            #         fletcher32=kwargs.get('fletcher32')
+            #     )
+
+            if i_object_value.get('value') is not None \
+                    and i_object_value.get('attr') is not None:
+                try:
+                    l_group.create_dataset(
+                        name=i_path,
+                        data=numpy.asarray(i_object_value.get('value'))
+                        if not isinstance(i_object_value.get('value'), (str, numpy.str_))
+                        else str(i_object_value.get('value')),
+                        **l_kwargs
+                    ).attrs.update(
+                        i_object_value.get('attr')
+                        if isinstance(i_object_value.get('attr'), dict) else {}
+                    )
+                except TypeError as error:
+                    self._log.error(
+                        'error writing %s: %s (%s), error was: %s',
+                        i_path,
                         i_object_value.get('value'),
-                        (str, int, float, numpy.str_, numpy.int_, numpy.float_)):
-                    kwargs.pop('compression', None)
-                    kwargs.pop('compression_opts', None)
-                    kwargs.pop('fletcher32', None)
-                    kwargs.pop('chunks', None)
-
-                if i_path in l_group:
-                    # remove previous object by i_path id and add the new one
-                    self._log.debug('removing previous path %s', i_path)
-                    del l_group[i_path]
-
-                # # If object is a pandas.DataFrame, write it to a separate hdf5 file (f_hdf5 with '_pandas' suffix) to avoid interfering with f_hdf5.
-                # # The DataFrame itself will also be stored in f_hdf5, but converted to a numpy array.
-                # if isinstance(i_object_value.get('value'), pandas.DataFrame):
-                #     i_object_value.get('value').to_hdf(
-                #         f'{Path(hdf5_file).parent}/{Path(hdf5_file).stem}_pandas{Path(hdf5_file).suffix}',
-                #         f'/{hdf5_base_path}/{i_path}',
-                #         complib=kwargs.get('compression') if kwargs.get('compression') in ('zlib', 'lzo', 'bzip2', 'blosc') else 'zlib',
-                #         complevel=kwargs.get('compression_opts'),
-                #         fletcher32=kwargs.get('fletcher32')
-                #     )
-
-                if i_object_value.get('value') is not None \
-                        and i_object_value.get('attr') is not None:
-                    try:
-                        l_group.create_dataset(
-                            name=i_path,
-                            data=numpy.asarray(i_object_value.get('value'))
-                            if not isinstance(i_object_value.get('value'), (str, numpy.str_))
-                            else str(i_object_value.get('value')),
-                            **kwargs
-                        ).attrs.update(
-                            i_object_value.get('attr')
-                            if isinstance(i_object_value.get('attr'), dict) else {}
-                        )
-                    except TypeError as error:
-                        self._log.error(
-                            'error writing %s: %s (%s), error was: %s',
-                            i_path,
-                            i_object_value.get('value'),
-                            type(i_object_value.get('value')),
-                            error
-                        )
-                        raise TypeError(error)
+                        type(i_object_value.get('value')),
+                        error
+                    )
+                    raise TypeError(error)
 
     @staticmethod
     def _flatten_object_dict(dictionary: dict) -> dict:
@@ -29,7 +29,7 @@ import pandas
 
 
 # pylint: disable=no-member
-def unfairness(data: pandas.Series) -> numpy.float64:
+def unfairness(data: typing.Union[pandas.Series, pandas.DataFrame]) -> typing.Union[numpy.float64, numpy.ndarray]:
     r'''
     Calculate the unfairness by means of the H-Spread of Hinges for given data points.
 
@@ -68,10 +68,15 @@ def unfairness(data: pandas.Series) -> numpy.float64:
     :see: Weisstein, Eric W. H-Spread. From MathWorld--A Wolfram Web Resource. http://mathworld.wolfram.com/H-Spread.html
     :see: Weisstein, Eric W. Hinge. From MathWorld--A Wolfram Web Resource. http://mathworld.wolfram.com/Hinge.html
     :param data: pandas.Series of data elements (preferably) :math:`4n+5` for :math:`n=0,1,...,N`, i.e. minimum length is :math:`5`.
-    :return: Hinge of type numpy.float64
+                 A pandas.DataFrame gets the unfairness of each of its columns calculated at once.
+    :return: Hinge of type numpy.float64, or numpy.ndarray of hinges of each column if data is a pandas.DataFrame
 
     '''
-    assert isinstance(data, pandas.Series)
+    assert isinstance(data, (pandas.Series, pandas.DataFrame))
+    if isinstance(data, pandas.DataFrame):
+        # one quantile call over all columns instead of one per column
+        return numpy.subtract(*data.quantile([.75, .25]).values) if not data.empty \
+            else numpy.zeros(len(data.columns))
     return numpy.subtract(*data.quantile([.75, .25])) if not data.empty else numpy.float64(0)
 
 
@@ -115,13 +120,16 @@ def dissatisfaction(
     )
     # pylint: enable=no-member
 
-def inefficiency(data: pandas.Series) -> typing.Union[numpy.int64, numpy.float64]:  # pylint: disable=no-member
+def inefficiency(data: typing.Union[pandas.Series, pandas.DataFrame]) \
+        -> typing.Union[numpy.int64, numpy.float64, numpy.ndarray]:  # pylint: disable=no-member
     '''
     Inefficiency model, i.e. sum of data
 
-    :param data: pandas.Series
-    :return: sum of data points
+    :param data: pandas.Series, or pandas.DataFrame to sum up each of its columns at once
+    :return: sum of data points, or numpy.ndarray of sums of each column if data is a pandas.DataFrame
     '''
 
-    assert isinstance(data, pandas.Series)
+    assert isinstance(data, (pandas.Series, pandas.DataFrame))
+    if isinstance(data, pandas.DataFrame):
+        return data.sum().values
     return data.sum()
@@ -37,8 +37,12 @@ from colmto.common.helper import VehicleType
 from colmto.common.helper import StatisticValue
 from colmto.cse.rule import BaseRule
 from colmto.cse.rule import SUMORule
+from colmto.cse.rule import SUMOPositionRule
 from colmto.environment.vehicle import SUMOVehicle
 
+# SUMO vehicle classes of allowed and denied vehicles, resolved once instead of on each apply
+_ALLOWED_CLASS_NAME = SUMORule.allowed_class_name()
+_DISALLOWED_CLASS_NAME = SUMORule.disallowed_class_name()
 
 class BaseCSE(object):
     '''Base class for the central optimisation entity (CSE).'''
@@ -94,7 +98,25 @@ class SumoCSE(BaseCSE):
             i_vtype: deque((StatisticValue.nanof(None) for _ in range(60)), maxlen=60)
             for i_vtype in VehicleType
         }
+        # rules split by whether their outcome per vehicle can change during a run (see `BaseRule.static`)
+        self._static_rules = tuple()
+        self._dynamic_rules = tuple()
+        self._position_rules = tuple()
+        # cached outcome of static rules per vehicle object
+        self._static_rule_results = {}
+        # sum of rule revisions the above is based on, i.e. changes whenever a rule got modified (see `BaseRule.revision`)
+        self._rules_revision = 0
 
+    @property
+    def position_rules(self) -> typing.Tuple[SUMOPositionRule, ...]:
+        '''
+        Position based rules of CSE, i.e. rules which are instances of `SUMOPositionRule`
+
+        :return: tuple of position rules
+
+        '''
+
+        return self._position_rules
 
     def traci(self, _traci: 'traci') -> SumoCSE:
         '''
@@ -128,13 +150,14 @@ class SumoCSE(BaseCSE):
             raise ValueError('Can\'t observe traffic without TraCI reference')
 
         # record occupancy
+        l_last_step_occupancy = self._traci.constants.LAST_STEP_OCCUPANCY
         for i_key, i_value in lane_subscription_results.items():
             if not i_key in self._occupancy_window:
                 raise KeyError(
                     f'Unexpected key (\'{i_key}\') of subcription results. Expected one of {list(self._occupancy_window.keys())}.')
-            self._occupancy_window.get(i_key).appendleft(i_value.get(self._traci.constants.LAST_STEP_OCCUPANCY))
+            self._occupancy_window[i_key].appendleft(i_value[l_last_step_occupancy])
         if self._args is not None and self._args.writefulloccupancies:
-            self._occupancy_full.get(i_key).append(i_value.get(self._traci.constants.LAST_STEP_OCCUPANCY))
+            self._occupancy_full[i_key].append(i_value[l_last_step_occupancy])
 
         # record dissatisfaction
         l_dissatisfaction = {
@@ -142,10 +165,10 @@ class SumoCSE(BaseCSE):
             for i_vtype in VehicleType
         }
         for i_vehicle_id in vehicle_subscription_results:
-            l_vehicle = vehicles.get(i_vehicle_id)
-            l_dissatisfaction.get(l_vehicle.vehicle_type).append(l_vehicle.dissatisfaction)
+            l_vehicle = vehicles[i_vehicle_id]
+            l_dissatisfaction[l_vehicle.vehicle_type].append(l_vehicle.dissatisfaction)
         for i_vtype, i_values in l_dissatisfaction.items():
-            self._dissatisfaction.get(i_vtype).appendleft(StatisticValue.nanof(i_values))
+            self._dissatisfaction[i_vtype].appendleft(StatisticValue.nanof(i_values))
 
         return self
 
@@ -248,8 +271,31 @@ class SumoCSE(BaseCSE):
         else:
             raise TypeError
 
+        self._partition_rules()
+
         return self
 
+    def _partition_rules(self):
+        '''
+        Partition rules by whether their outcome per vehicle can change during a run (see `BaseRule.static`)
+        and drop cached outcomes of static rules.
+        '''
+
+        self._static_rules = tuple(i_rule for i_rule in self._rules if i_rule.static)
+        self._dynamic_rules = tuple(i_rule for i_rule in self._rules if not i_rule.static)
+        self._position_rules = tuple(i_rule for i_rule in self._rules if isinstance(i_rule, SUMOPositionRule))
+        self._static_rule_results.clear()
+        self._rules_revision = sum(i_rule.revision for i_rule in self._rules)
+
+    def _update_rules(self):
+        '''
+        Partition rules again if any of them got modified after being added, e.g. by adding sub-rules to an
+        extendable rule, as this can change both its outcome and whether it is static.
+        '''
+
+        if sum(i_rule.revision for i_rule in self._rules) != self._rules_revision:
+            self._partition_rules()
+
     def add_rules(self, rules: typing.Iterable[SUMORule]) -> SumoCSE:
         '''
         Add iterable of rules to SumoCSE.
@@ -267,7 +313,9 @@ class SumoCSE(BaseCSE):
 
     def apply(self, vehicles: typing.Union[typing.Iterable[SUMOVehicle], typing.Dict[str, SUMOVehicle]]) -> SumoCSE:
         '''
-        Apply rules to vehicles
+        Apply rules to a batch of vehicles, e.g. all vehicles of one simulation step.
+        Median occupancy and dissatisfaction only change with observed traffic,
+        hence they are calculated once for the whole batch.
 
         :type vehicles: typing.Union[SUMOVehicle, typing.Dict[str, SUMOVehicle]]
         :param vehicles: Iterable of vehicles or dictionary Id -> Vehicle
@@ -275,8 +323,11 @@ class SumoCSE(BaseCSE):
 
         '''
 
+        self._update_rules()
+        l_occupancy = self._median_occupancy()
+        l_dissatisfaction = self._median_dissatisfaction()
         for i_vehicle in vehicles.values() if isinstance(vehicles, dict) else vehicles:
-            self.apply_one(i_vehicle)
+            self._apply_one(i_vehicle, l_occupancy, l_dissatisfaction)
         return self
 
     def apply_one(self, vehicle: SUMOVehicle) -> SumoCSE:
@@ -289,12 +340,39 @@ class SumoCSE(BaseCSE):
 
         '''
 
-        for i_rule in self._rules:
-            if i_rule.applies_to(vehicle, occupancy=self._median_occupancy(), dissatisfaction=self._median_dissatisfaction()):
-                vehicle.deny_otl_access(self._traci).vehicle_class = SUMORule.disallowed_class_name()
-                self._traci.vehicle.setVehicleClass(vehicle.sumo_id, vehicle.vehicle_class) if self._traci else None
-                return self
-        # default case: no applicable rule found -> allow
-        vehicle.allow_otl_access(self._traci).vehicle_class = SUMORule.allowed_class_name()
-        self._traci.vehicle.setVehicleClass(vehicle.sumo_id, vehicle.vehicle_class) if self._traci else None
+        self._update_rules()
+        return self._apply_one(vehicle, self._median_occupancy(), self._median_dissatisfaction())
+
+    def _apply_one(self, vehicle: SUMOVehicle, occupancy: typing.Dict[str, float],
+                   dissatisfaction: typing.Dict[VehicleType, StatisticValue]) -> SumoCSE:
+        '''
+        Apply rules to one vehicle using given median occupancy and dissatisfaction
+
+        :type vehicle: SUMOVehicle
+        :param vehicle: Vehicle
+        :param occupancy: median occupancy of lanes (see `_median_occupancy`)
+        :param dissatisfaction: median dissatisfaction of vehicle types (see `_median_dissatisfaction`)
+        :return: `SumoCSE` as future reference
+
+        '''
+
+        # outcome of static rules never changes for a vehicle, hence evaluate them only once per vehicle
+        l_static_rules_apply = self._static_rule_results.get(vehicle)
+        if l_static_rules_apply is None:
+            l_static_rules_apply = self._static_rule_results[vehicle] = any(
+                i_rule.applies_to(vehicle, occupancy=occupancy, dissatisfaction=dissatisfaction)
+                for i_rule in self._static_rules
+            )
+
+        if l_static_rules_apply or any(
+                i_rule.applies_to(vehicle, occupancy=occupancy, dissatisfaction=dissatisfaction)
+                for i_rule in self._dynamic_rules):
+            vehicle.deny_otl_access(self._traci).vehicle_class = _DISALLOWED_CLASS_NAME
+        else:
+            # default case: no applicable rule found -> allow
+            vehicle.allow_otl_access(self._traci).vehicle_class = _ALLOWED_CLASS_NAME
+
+        # only tell SUMO about the vehicle class if it actually changed
+        vehicle.sync_vehicle_class(self._traci)
+
         return self
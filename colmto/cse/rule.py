@@ -57,6 +57,27 @@ class BaseRule(metaclass=ABCMeta):
         '''
         pass
 
+    @property
+    def static(self) -> bool:
+        '''
+        Whether this rule's outcome for a given vehicle stays the same throughout a simulation run,
+        i.e. only depends on vehicle attributes which never change (e.g. vehicle type, maximum speed).
+        Outcomes of static rules can be cached per vehicle.
+
+        :return: False by default
+        '''
+        return False
+
+    @property
+    def revision(self) -> int:
+        '''
+        Number of modifications of this rule since its creation, e.g. added sub-rules (see `ExtendableRule`).
+        Anything derived from a rule, e.g. cached outcomes of static rules, is outdated once its revision changed.
+
+        :return: 0 by default, as rules are not modifiable
+        '''
+        return 0
+
     @classmethod
     def rule_cls(cls, rule_name: str) -> BaseRule:
         '''
@@ -169,6 +190,7 @@ class ExtendableRule(BaseRule, metaclass=ABCMeta):
         '''
 
         self._subrules = set()
+        self._revision = 0
 
         if not isinstance(subrule_operator, (str, RuleOperator)):
             raise TypeError
@@ -190,6 +212,13 @@ class ExtendableRule(BaseRule, metaclass=ABCMeta):
 
         super().__init__()
 
+    @property
+    def revision(self) -> int:
+        '''
+        :return: number of modifications of this rule, i.e. added sub-rules and changed sub-rule operators
+        '''
+        return self._revision
+
     @property
     def subrules(self) -> frozenset:
         '''
@@ -223,6 +252,7 @@ class ExtendableRule(BaseRule, metaclass=ABCMeta):
         if rule_operator not in RuleOperator:
             raise ValueError
         self._subrule_operator = rule_operator
+        self._revision += 1
 
     def add_subrule(self, subrule: BaseRule) -> BaseRule:
         '''
@@ -245,6 +275,7 @@ class ExtendableRule(BaseRule, metaclass=ABCMeta):
             raise TypeError(f'{type(subrule)} can\'t be an ExtendableRule.')
 
         self._subrules.add(subrule)
+        self._revision += 1
 
         return self
 
@@ -273,6 +304,13 @@ class SUMOUniversalRule(SUMORule, rule_name='SUMOUniversalRule'):
     Universal rule, i.e. always applies to any vehicle
     '''
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, as outcome does not depend on changing vehicle or traffic state
+        '''
+        return True
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this rule applies to given vehicle
@@ -290,6 +328,13 @@ class SUMONullRule(SUMORule, rule_name='SUMONullRule'):
     Null rule, i.e. no restrictions: Applies to no vehicle
     '''
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, as outcome does not depend on changing vehicle or traffic state
+        '''
+        return True
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this rule applies to given vehicle.
@@ -334,6 +379,13 @@ class SUMOVTypeRule(SUMOVehicleRule, rule_name='SUMOVTypeRule'):
         return f'{self.__class__}: ' \
                f'vehicle_type = {self._vehicle_type}'
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, as outcome does not depend on changing vehicle or traffic state
+        '''
+        return True
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this rule applies to given vehicle.
@@ -372,6 +424,13 @@ class ExtendableSUMOVTypeRule(SUMOVTypeRule, ExtendableSUMORule, rule_name='Exte
                f'subrule_operator: {self._subrule_operator}, ' \
                f'subrules: {self.subrules_as_str}'
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, iff this rule and all sub-rules are static
+        '''
+        return super().static and all(i_rule.static for i_rule in self._subrules)
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this rule applies to given vehicle.
@@ -403,6 +462,13 @@ class SUMOMinimalSpeedRule(SUMOVehicleRule, rule_name='SUMOMinimalSpeedRule'):
         return f'{self.__class__}: ' \
                f'minimal_speed = {self._minimal_speed}'
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, as outcome does not depend on changing vehicle or traffic state
+        '''
+        return True
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this rule applies to given vehicle.
@@ -441,6 +507,13 @@ class ExtendableSUMOMinimalSpeedRule(SUMOMinimalSpeedRule, ExtendableSUMORule, r
                f'subrule_operator: {self._subrule_operator}, ' \
                f'subrules: {self.subrules_as_str}'
 
+    @property
+    def static(self) -> bool:
+        '''
+        :return: True, iff this rule and all sub-rules are static
+        '''
+        return super().static and all(i_rule.static for i_rule in self._subrules)
+
     def applies_to(self, vehicle: 'SUMOVehicle', **kwargs) -> bool:
         '''
         Test whether this (and sub)rules apply to given vehicle.
@@ -472,6 +545,11 @@ class SUMOPositionRule(SUMOVehicleRule, rule_name='SUMOPositionRule'):
         assert BoundingBox(*bounding_box).p1.x <= BoundingBox(*bounding_box).p2.x
         assert BoundingBox(*bounding_box).p1.y <= BoundingBox(*bounding_box).p2.y
         self._bounding_box = BoundingBox(*bounding_box)
+        # plain float corners (x1, y1, x2, y2) for cheap containment checks in applies_to
+        self._bounding_box_tuple = (
+            float(self._bounding_box.p1.x), float(self._bounding_box.p1.y),
+            float(self._bounding_box.p2.x), float(self._bounding_box.p2.y)
+        )
         self._outside = bool(outside)
 
     def __str__(self):
@@ -496,7 +574,9 @@ class SUMOPositionRule(SUMOVehicleRule, rule_name='SUMOPositionRule'):
 
         '''
 
-        return self._outside ^ self._bounding_box.contains(vehicle.position)
+        l_x1, l_y1, l_x2, l_y2 = self._bounding_box_tuple
+        l_position = vehicle.position
+        return self._outside ^ (l_x1 <= l_position.x <= l_x2 and l_y1 <= l_position.y <= l_y2)
 
 
 class ExtendableSUMOPositionRule(SUMOPositionRule, ExtendableSUMORule, rule_name='ExtendableSUMOPositionRule'):
@@ -44,6 +44,8 @@ import pandas
 class BaseVehicle(object):
     '''Base Vehicle.'''
 
+    __slots__ = ('_properties',)
+
     def __init__(self):
         '''Initialisation'''
         self._properties = {
@@ -85,6 +87,28 @@ class SUMOVehicle(BaseVehicle):
 
     '''
 
+    __slots__ = ('_environment', '_traci_colour', '_vehicle_class_changed', '_grid_based_series_dict')
+
+    # grid based metrics in the order update() provides their values
+    _grid_metrics = (
+        Metric.TIME_STEP.value,
+        Metric.POSITION_Y.value,
+        Metric.GRID_POSITION_Y.value,
+        Metric.DISSATISFACTION.value,
+        Metric.TRAVEL_TIME.value,
+        Metric.TIME_LOSS.value,
+        Metric.RELATIVE_TIME_LOSS.value,
+        Metric.LANE_INDEX.value
+    )
+
+    # colours of vehicles with denied OTL access, depending on their cooperation disposition
+    _deny_colours = MappingProxyType(
+        {
+            VehicleDisposition.COOPERATIVE: Colour(255, 0, 0, 255),
+            VehicleDisposition.UNCOOPERATIVE: Colour(127, 127, 127, 255)
+        }
+    )
+
     # pylint: disable=too-many-arguments
     def __init__(self,
                  environment: dict,
@@ -140,6 +164,11 @@ class SUMOVehicle(BaseVehicle):
 
         self._environment = environment
 
+        # colour last sent to SUMO via TraCI, to skip redundant setColor calls
+        self._traci_colour = None
+        # whether vehicle class changed since it was last sent to SUMO (initially SUMO knows it from the trip file)
+        self._vehicle_class_changed = False
+
         # prepare grid-based series using OrderedDicts to maintain the order of keys
         self._grid_based_series_dict = {
             i_metric.value : OrderedDict()
@@ -281,9 +310,25 @@ class SUMOVehicle(BaseVehicle):
     @vehicle_class.setter
     def vehicle_class(self, vehicle_class: str):
         '''
-        Set UMO vehicle class
+        Set SUMO vehicle class and mark it as changed, iff it differs from the current one
+        '''
+        l_vehicle_class = str(vehicle_class)
+        if l_vehicle_class != self._properties['vClass']:
+            self._properties['vClass'] = l_vehicle_class
+            self._vehicle_class_changed = True
+
+    def sync_vehicle_class(self, traci: 'traci' = None) -> BaseVehicle:
         '''
-        self._properties['vClass'] = str(vehicle_class)
+        Send vehicle class to SUMO via TraCI, iff it changed since it was sent last time.
+
+        :param traci: traci control reference
+        :return: self
+        '''
+
+        if traci and self._vehicle_class_changed:
+            traci.vehicle.setVehicleClass(self.sumo_id, self._properties['vClass'])
+            self._vehicle_class_changed = False
+        return self
 
     @property
     def speed_max(self) -> float:
@@ -361,9 +406,8 @@ class SUMOVehicle(BaseVehicle):
         :return: self
         '''
 
-        self._properties['colour'] = self.normal_colour
-        if traci:
-            traci.vehicle.setColor(self.sumo_id, self.colour.as_tuple())
+        self._properties['colour'] = self._properties['normal_colour']
+        self._set_traci_colour(traci)
         return self
 
     def deny_otl_access(self, _traci: 'traci' = None) -> BaseVehicle:
@@ -378,18 +422,28 @@ class SUMOVehicle(BaseVehicle):
         :return: self
         '''
 
-        if self.cooperation_disposition == VehicleDisposition.COOPERATIVE:
-            # show that I'm cooperative by painting myself red
-            self._properties['colour'] = Colour(255, 0, 0, 255)
-            if _traci:
-                _traci.vehicle.setColor(self.sumo_id, self.colour.as_tuple())
-                # as I'm cooperative, always keep to the right lane
-                _traci.vehicle.changeLane(self.sumo_id, 0, 1)
-        else:
-            # show that I'm uncooperative by painting myself gray
-            self._properties['colour'] = Colour(127, 127, 127, 255)
-            if _traci:
-                _traci.vehicle.setColor(self.sumo_id, self.colour.as_tuple())
+        # show whether I'm cooperative by painting myself red, or uncooperative by painting myself gray
+        l_disposition = self._properties['cooperation_disposition']
+        self._properties['colour'] = SUMOVehicle._deny_colours[l_disposition]
+        self._set_traci_colour(_traci)
+        if _traci and l_disposition is VehicleDisposition.COOPERATIVE:
+            # as I'm cooperative, always keep to the right lane
+            _traci.vehicle.changeLane(self.sumo_id, 0, 1)
+        return self
+
+    def _set_traci_colour(self, traci: 'traci' = None) -> BaseVehicle:
+        '''
+        Send current colour to SUMO via TraCI, iff it differs from the colour sent last time.
+
+        :param traci: traci control reference
+        :return: self
+        '''
+
+        l_colour = self._properties['colour']
+        # colours are shared immutable objects, so the identity check usually settles it without comparing channels
+        if traci and self._traci_colour is not l_colour and self._traci_colour != l_colour:
+            traci.vehicle.setColor(self.sumo_id, l_colour.as_tuple())
+            self._traci_colour = l_colour
         return self
 
     def update(self, position: Position, lane_index: int, speed: float, time_step: float) -> BaseVehicle:
@@ -409,62 +463,64 @@ class SUMOVehicle(BaseVehicle):
 
         '''
 
+        # read vehicle properties once into locals instead of going through the properties on each access
+        l_properties = self._properties
+        l_time_step = float(time_step)
+        l_speed = float(speed)
+        l_lane_index = int(lane_index)
+        l_start_time = float(l_properties['start_time'])
+        l_speed_max = float(l_properties['maxSpeed'])
+
         # update current vehicle properties
         l_position = Position(*position)
         assert l_position.x >= 0 and l_position.y >= 0
-        self._properties['position'] = l_position
-        self._properties['grid_position'] = l_position.gridified(width=self._environment.get('gridcellwidth'))
-        assert float(speed) >= 0
-        self._properties['speed']  = float(speed)
-        assert float(time_step) >= 0
-        self._properties['time_step'] = float(time_step)
-        assert float(time_step) >= self.start_time
-        self._properties['travel_time'] = float(time_step) - self.start_time
-        assert int(lane_index) in (0, 1)
-        self._properties['lane_index'] = int(lane_index)
+        l_grid_position = l_position.gridified(width=self._environment.get('gridcellwidth'))
+        l_properties['position'] = l_position
+        l_properties['grid_position'] = l_grid_position
+        assert l_speed >= 0
+        l_properties['speed'] = l_speed
+        assert l_time_step >= 0
+        l_properties['time_step'] = l_time_step
+        assert l_time_step >= l_start_time
+        l_travel_time = l_time_step - l_start_time
+        l_properties['travel_time'] = l_travel_time
+        assert l_lane_index in (0, 1)
+        l_properties['lane_index'] = l_lane_index
 
         # vehicle/generic optimal travel time: round positions of division as SUMO reports positions with reduced
         # accuracy (2 significant figures) to avoid negative travel time losses.
-        l_generic_optimal_travel_time = round(self.position.x / self.speed_max, 2)
+        l_generic_optimal_travel_time = round(l_position.x / l_speed_max, 2)
 
         # Vehicle optimal travel time: include, i.e. substract the start_position as SUMO puts
         # vehicles at lane positions greater than 0 in their first active time step if they started
         # between the previous and current global (runtime) time step.
-        l_vehicle_optimal_travel_time = round((self.position.x - self.start_position.x) / self.speed_max, 2)
-        l_vehicle_time_loss = self.travel_time - l_vehicle_optimal_travel_time
+        l_vehicle_optimal_travel_time = round((l_position.x - l_properties['start_position'].x) / l_speed_max, 2)
+        l_vehicle_time_loss = l_travel_time - l_vehicle_optimal_travel_time
         assert l_vehicle_time_loss >= 0
 
-        self._properties['dissatisfaction'] = colmto.common.model.dissatisfaction(
+        l_dissatisfaction = colmto.common.model.dissatisfaction(
             time_loss=l_vehicle_time_loss,
             optimal_travel_time=l_generic_optimal_travel_time,
-            time_loss_threshold=self.dsat_threshold
+            time_loss_threshold=float(l_properties['dsat_threshold'])
         )
-        assert 0 <= self.dissatisfaction <= 1
+        l_properties['dissatisfaction'] = l_dissatisfaction
+        assert 0 <= l_dissatisfaction <= 1
 
         # update data series based on grid cell
-        self._grid_based_series_dict.get(Metric.TIME_STEP.value)[
-            (Metric.TIME_STEP.value, self.grid_position.x)
-        ] = float(time_step)
-        self._grid_based_series_dict.get(Metric.POSITION_Y.value)[
-            (Metric.POSITION_Y.value, self.grid_position.x)
-        ] = self.position.y
-        self._grid_based_series_dict.get(Metric.GRID_POSITION_Y.value)[
-            (Metric.GRID_POSITION_Y.value, self.grid_position.x)
-        ] = self.grid_position.y
-        self._grid_based_series_dict.get(Metric.DISSATISFACTION.value)[
-            (Metric.DISSATISFACTION.value, self.grid_position.x)
-        ] = self.dissatisfaction
-        self._grid_based_series_dict.get(Metric.TRAVEL_TIME.value)[
-            (Metric.TRAVEL_TIME.value, self.grid_position.x)
-        ] = self.travel_time
-        self._grid_based_series_dict.get(Metric.TIME_LOSS.value)[
-            (Metric.TIME_LOSS.value, self.grid_position.x)
-        ] = l_vehicle_time_loss
-        self._grid_based_series_dict.get(Metric.RELATIVE_TIME_LOSS.value)[
-            (Metric.RELATIVE_TIME_LOSS.value, self.grid_position.x)
-        ] = l_vehicle_time_loss / l_generic_optimal_travel_time if l_generic_optimal_travel_time > 0 else 0
-        self._grid_based_series_dict.get(Metric.LANE_INDEX.value)[
-            (Metric.LANE_INDEX.value, self.grid_position.x)
-        ] = self.lane
+        l_grid_x = l_grid_position.x
+        for i_metric, i_value in zip(
+                SUMOVehicle._grid_metrics,
+                (
+                    l_time_step,
+                    l_position.y,
+                    l_grid_position.y,
+                    float(l_dissatisfaction),
+                    l_travel_time,
+                    l_vehicle_time_loss,
+                    l_vehicle_time_loss / l_generic_optimal_travel_time if l_generic_optimal_travel_time > 0 else 0,
+                    l_lane_index
+                )
+        ):
+            self._grid_based_series_dict[i_metric][(i_metric, l_grid_x)] = i_value
 
         return self
\ No newline at end of file
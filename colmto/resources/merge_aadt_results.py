@@ -41,10 +41,20 @@ def main(args):
         l_input_files = [f_stack.enter_context(h5py.File(i_fname, 'r')) for i_fname in args.input_files]
         f_output_file = f_stack.enter_context(h5py.File(args.output_file, 'a', libver='latest'))
         for i_fin in l_input_files:
+            if not args.dryrun and not args.selective and args.root not in f_output_file:
+                # copy the whole root tree (i.e. all AADTs) in one go
+                print(f'copy {args.root} to {f_output_file}')
+                i_fin.copy(source=args.root, dest=f_output_file, name=args.root)
+                continue
+
             for i_aadt in i_fin[args.root].keys():
                 if not args.dryrun:
                     print(f'copy {args.root}/{i_aadt} to {f_output_file}')
-                    i_fin.copy(source=f'{args.root}/{i_aadt}', dest=f_output_file)
+                    i_fin.copy(
+                        source=f'{args.root}/{i_aadt}',
+                        dest=f_output_file.require_group(args.root),
+                        name=i_aadt
+                    )
                 else:
                     print(f'would copy {args.root}/{i_aadt} to {f_output_file}')
 
@@ -80,5 +90,12 @@ if __name__ == '__main__':
         action='store_true',
         default=False
     )
+    l_parser.add_argument(
+        '-s',
+        dest='selective',
+        action='store_true',
+        default=False,
+        help='Copy AADTs one by one instead of the whole root dir element at once.'
+    )
 
     main(l_parser.parse_args())
@@ -12,6 +12,11 @@ def main(argv):
     l_aadt = ('4800', '8400', '12000', '13000', '15600', '19200', '22800', '26400', '30000', '33600', '37200', '40800', '44400', '48000')
     l_colors = dict(zip(l_sensors, ['#e66101','#fdb863','#b2abd2','#5e3c99']))
     l_color_labels = dict(zip(['#e66101','#fdb863','#b2abd2','#5e3c99'], l_sensors))
+    l_offsets = dict(zip(l_sensors, list(range(-len(l_sensors)//2, 0))+list(range(1, len(l_sensors)//2+1))))
+    # box positions and x ticks are the same for every figure
+    l_base_positions = np.arange(len(l_aadt)) * 2.0
+    l_positions = {i_sensor: l_base_positions + i_offset*0.4 for i_sensor, i_offset in l_offsets.items()}
+    l_xtick_locs = np.arange(0, len(l_aadt) * 2, 2)
 
     if len(sys.argv) != 2:
         print('Usage: plot.py hdf5-input-file')
@@ -28,19 +33,19 @@ def main(argv):
                         }
                         plt.figure()
 
-                        for i_sensor in zip(l_sensors, list(range(-len(l_sensors)//2, 0))+list(range(1, len(l_sensors)//2+1))):
-                            bp = plt.boxplot(rtls[i_sensor[0]], positions=np.array(range(len(rtls[i_sensor[0]])))*2.0+i_sensor[1]*0.4, sym='', widths=0.6)
-                            plt.setp(bp['boxes'], color=l_colors[i_sensor[0]])
-                            plt.setp(bp['whiskers'], color=l_colors[i_sensor[0]])
-                            plt.setp(bp['caps'], color=l_colors[i_sensor[0]])
-                            plt.setp(bp['medians'], color=l_colors[i_sensor[0]])
+                        for i_sensor in l_sensors:
+                            bp = plt.boxplot(rtls[i_sensor], positions=l_positions[i_sensor], sym='', widths=0.6)
+                            plt.setp(bp['boxes'], color=l_colors[i_sensor])
+                            plt.setp(bp['whiskers'], color=l_colors[i_sensor])
+                            plt.setp(bp['caps'], color=l_colors[i_sensor])
+                            plt.setp(bp['medians'], color=l_colors[i_sensor])
 
                         for i_color, i_label in l_color_labels.items():
                             plt.plot([], c=i_color, label=f'{i_label*4}m')
 
                         plt.legend()
                         plt.xticks(rotation=70)
-                        plt.xticks(range(0, len(l_aadt) * 2, 2), l_aadt)
+                        plt.xticks(l_xtick_locs, l_aadt)
                         plt.xlim(-2, len(l_aadt)*2)
                         plt.ylim(-0.1, 3)
                         plt.tight_layout()
@@ -27,6 +27,12 @@ g_ordering_colors = dict(zip(g_orderings, ('#1b9e77','#7570b3','#d95f02')))
 g_ordering_color_labels = dict(zip(('#1b9e77','#7570b3','#d95f02'), g_orderings))
 g_lane_colors = dict(zip(('21edge_0', '21edge_1'), ('#fdae61','#2c7bb6')))
 g_lane_labels = dict(zip(g_lane_colors, ('right lane', 'overtaking lane')))
+# box positions and x ticks are the same for every figure
+g_positions = {
+    i_ordering: np.arange(len(g_aadt))*2.0+i_offset*0.6
+    for i_ordering, i_offset in zip(g_ordering_colors, (-1, 0, 1))
+}
+g_xtick_locs = np.arange(0, len(g_aadt) * 2, 2)
 
 g_data = {
     i_policy: {
@@ -69,25 +75,25 @@ for i_policy in g_policies:
     for i_lane in g_lane_labels:
         plt.figure()
         plt.grid(b=True, which='both', color='lightgray', axis='y', linestyle='--')
-        for i_ordering in zip(g_ordering_colors, (-1, 0, 1)):
+        for i_ordering in g_ordering_colors:
             bp = plt.boxplot(
-                [g_data[i_policy][i_aadt][i_ordering[0]][i_lane]
+                [g_data[i_policy][i_aadt][i_ordering][i_lane]
                  for i_aadt in g_aadt],
-                positions=np.array(range(14))*2.0+i_ordering[1]*0.6,
+                positions=g_positions[i_ordering],
                 sym='',
                 widths=0.4
             )
-            plt.setp(bp['boxes'], color=g_ordering_colors[i_ordering[0]])
-            plt.setp(bp['whiskers'], color=g_ordering_colors[i_ordering[0]])
-            plt.setp(bp['caps'], color=g_ordering_colors[i_ordering[0]])
-            plt.setp(bp['medians'], color=g_ordering_colors[i_ordering[0]])
+            plt.setp(bp['boxes'], color=g_ordering_colors[i_ordering])
+            plt.setp(bp['whiskers'], color=g_ordering_colors[i_ordering])
+            plt.setp(bp['caps'], color=g_ordering_colors[i_ordering])
+            plt.setp(bp['medians'], color=g_ordering_colors[i_ordering])
 
         for i_color, i_label in g_ordering_color_labels.items():
             plt.plot([], c=i_color, label=f'{i_label} (median: {np.round(np.median(list(flatten((g_data[i_policy][i_aadt][i_label][i_lane] for i_aadt in g_aadt)))), 2)}, max: {round(max(flatten([g_data[i_policy][i_aadt][i_label][i_lane] for i_aadt in g_aadt])), 2)})')
 
         plt.legend(title='Initial ordering of vehicles')
         plt.xticks(rotation=70)
-        plt.xticks(range(0, len(g_aadt) * 2, 2), g_aadt)
+        plt.xticks(g_xtick_locs, g_aadt)
         plt.xlim(-2, len(g_aadt)*2)
         plt.ylim(-0.005, g_ylim)
         plt.title(f'{i_policy} policy: Occupancy of {g_lane_labels[i_lane]} vs. demand')
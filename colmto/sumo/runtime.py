@@ -24,6 +24,10 @@
 '''Runtime to control SUMO.'''
 
 
+import concurrent.futures
+import functools
+import logging
+import multiprocessing
 import os
 import subprocess
 import sys
@@ -34,7 +38,6 @@ from colmto.environment.vehicle import SUMOVehicle
 import colmto.common.io
 import colmto.common.log
 import colmto.cse.cse
-import colmto.cse.rule
 
 try:
     sys.path.append(os.path.join('sumo', 'tools'))
@@ -44,6 +47,22 @@ except ImportError:  # pragma: no cover
     raise ImportError('please declare environment variable \'SUMO_HOME\' as the root')
 
 
+@functools.lru_cache(maxsize=None)
+def _libsumo():
+    '''
+    Import libsumo on first use only, as loading SUMO as a library takes its time
+    and is not needed for stand alone and GUI runs.
+    libsumo mirrors the TraCI API but runs SUMO in-process, i.e. without a TCP round trip per call.
+
+    :return: libsumo module, None if not available
+    '''
+    try:
+        import libsumo  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: no cover
+        return None
+    return libsumo
+
+
 class Runtime(object):
     '''Runtime class'''
 
@@ -52,8 +71,64 @@ class Runtime(object):
         self._args = args
         self._sumo_config = sumo_config
         self._sumo_binary = sumo_binary
+        # SUMO command line arguments common to all runs
+        self._sumo_base_args = (str(sumo_binary), '--time-to-teleport', '-1', '--no-step-log')
+        # TraCI backend (traci or libsumo module) of a SUMO instance kept running between TraCI runs
+        self._traci_backend = None
+        # whether to keep SUMO running between TraCI runs, i.e. inside a with statement (see `__enter__`)
+        self._keep_running = False
         self._log = colmto.common.log.logger(__name__, args.loglevel, args.quiet, args.logfile)
 
+    def __getstate__(self) -> dict:
+        '''
+        Don't hand a running SUMO instance on when pickled, e.g. to worker processes of `run_many`.
+
+        :return: state
+        '''
+        l_state = self.__dict__.copy()
+        l_state['_traci_backend'] = None
+        l_state['_keep_running'] = False
+        return l_state
+
+    def __setstate__(self, state: dict):
+        '''
+        Restore state, e.g. in worker processes of `run_many`, and re-create the logger's handlers, which a
+        pickled logger does not carry into freshly spawned processes.
+
+        :param state: state
+        '''
+        self.__dict__.update(state)
+        self._log = colmto.common.log.logger(
+            __name__, self._args.loglevel, self._args.quiet, self._args.logfile
+        )
+
+    def __enter__(self) -> 'Runtime':
+        '''
+        Keep SUMO running between TraCI runs (see `run_traci`) until leaving the with statement,
+        i.e. subsequent runs load their configuration into the running SUMO instead of starting a new one.
+
+        :return: self
+        '''
+        self._keep_running = True
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        '''
+        Close SUMO instance kept running between TraCI runs.
+        '''
+        self._keep_running = False
+        self.close()
+
+    def close(self):
+        '''
+        Close SUMO instance kept running between TraCI runs, if any.
+        '''
+
+        if self._traci_backend is not None:
+            self._log.debug('closing sumo process (%s)', self._traci_backend.__name__)
+            self._traci_backend.close()
+            self._traci_backend = None
+
     def run_standalone(self, run_config: dict):
         '''
         Run provided scenario in one shot.
@@ -66,24 +141,89 @@ class Runtime(object):
             run_config.get('scenarioname'), run_config.get('runnumber')
         )
 
-        l_sumoprocess = subprocess.check_output(
-            [
-                self._sumo_binary,
-                '-c', run_config.get('configfile'),
-                '--gui-settings-file', run_config.get('settingsfile'),
-                '--time-to-teleport', '-1',
-                '--no-step-log',
-                '--fcd-output', run_config.get('fcdfile')
-            ],
-            stderr=subprocess.STDOUT,
-            bufsize=-1
-        )
+        l_command = [
+            *self._sumo_base_args,
+            '-c', str(run_config.get('configfile')),
+            '--gui-settings-file', str(run_config.get('settingsfile')),
+            '--fcd-output', str(run_config.get('fcdfile'))
+        ]
+        l_debug = self._log.isEnabledFor(logging.DEBUG)
+
+        # stream SUMO's output line by line into the debug log instead of buffering all of it in memory,
+        # and discard it right away if it won't be logged anyway
+        with subprocess.Popen(
+                l_command,
+                stdout=subprocess.PIPE if l_debug else subprocess.DEVNULL,
+                stderr=subprocess.STDOUT,
+                universal_newlines=True
+        ) as f_sumoprocess:
+            if l_debug:
+                for i_line in f_sumoprocess.stdout:
+                    self._log.debug('%s : %s', self._sumo_binary, i_line.rstrip())
+
+        if f_sumoprocess.returncode:
+            raise subprocess.CalledProcessError(f_sumoprocess.returncode, l_command)
+
+    def run_standalone_many(self, run_configs: typing.Sequence[dict],
+                            workers: typing.Optional[int] = None) -> typing.Iterator[dict]:
+        '''
+        Run several independent scenario runs in one shot (see `run_standalone`) in parallel.
+        As each run is a separate SUMO process, worker threads merely wait for them.
+        Runs with SUMO GUI or with only one worker are executed sequentially.
 
-        self._log.debug(
-            '%s : %s',
-            self._sumo_binary,
-            l_sumoprocess.decode('utf8').replace('\n', '')
-        )
+        :param run_configs: run configurations
+        :param workers: maximum number of parallel SUMO processes (default: number of CPUs)
+
+        :return: iterator over the run configurations, yielded in given order once their run has finished
+        '''
+
+        l_workers = min(workers or os.cpu_count() or 1, len(run_configs))
+
+        if l_workers <= 1 or not self._sumo_config.sumo_run_config.get('headless'):
+            for i_run_config in run_configs:
+                self.run_standalone(i_run_config)
+                yield i_run_config
+            return
+
+        self._log.debug('running %d standalone runs with %d worker threads', len(run_configs), l_workers)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=l_workers) as l_executor:
+            for i_run_config, _ in zip(run_configs, l_executor.map(self.run_standalone, run_configs)):
+                yield i_run_config
+
+    def run_many(self, run_configs: typing.Sequence[dict], cses: typing.Sequence[colmto.cse.cse.SumoCSE],
+                 workers: typing.Optional[int] = None) -> typing.List[typing.Dict[str, SUMOVehicle]]:
+        '''
+        Run several independent scenario runs with TraCI (see `run_traci`) in parallel.
+        As libsumo only supports one simulation per process, each run is executed in a separate worker process.
+        Runs with SUMO GUI or with only one worker are executed sequentially in this process.
+
+        :param run_configs: run configurations
+        :param cses: central optimisation entity (instance of colmto.cse.cse.SumoCSE) for each run configuration
+        :param workers: maximum number of worker processes (default: number of CPUs)
+
+        :return: list of vehicle dicts, containing travel stats, in order of the given run configurations
+        '''
+
+        if len(run_configs) != len(cses):
+            raise ValueError('Number of run configurations and CSE instances must match.')
+
+        l_workers = min(workers or os.cpu_count() or 1, len(run_configs))
+
+        if l_workers <= 1 or not self._sumo_config.sumo_run_config.get('headless'):
+            return [
+                self.run_traci(i_run_config, i_cse) for i_run_config, i_cse in zip(run_configs, cses)
+            ]
+
+        self._log.debug('running %d runs with %d worker processes', len(run_configs), l_workers)
+
+        # spawn fresh worker processes, i.e. each worker imports its own libsumo instance
+        # (workers never keep SUMO running, see `__getstate__`)
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=l_workers,
+                mp_context=multiprocessing.get_context('spawn')
+        ) as l_executor:
+            return list(l_executor.map(self.run_traci, run_configs, cses))
 
     def run_traci(self, run_config: dict, cse: colmto.cse.cse.SumoCSE) -> typing.Dict[str, SUMOVehicle]:
         '''
@@ -95,130 +235,180 @@ class Runtime(object):
             2. apply active policy, i.e. rules on vehicles:
                Tell vehicles whether they are allowed to use OTL or not
 
+        SUMO gets closed after the run, unless called inside a with statement on this runtime
+        (see `__enter__`), which keeps SUMO running for the next run until leaving the with statement.
+        SUMO gets closed in any case if the run fails.
+
+        :param run_config: run configuration
+        :param cse: central optimisation entity instance of colmto.cse.cse.SumoCSE
+
+        :return: list of vehicles, containing travel stats
+        '''
+
+        try:
+            l_vehicles = self._run_traci(run_config, cse)
+        except BaseException:
+            self.close()
+            raise
+
+        if not self._keep_running:
+            self.close()
+
+        return l_vehicles
+
+    def _run_traci(self, run_config: dict, cse: colmto.cse.cse.SumoCSE) -> typing.Dict[str, SUMOVehicle]:
+        '''
+        Run provided scenario with TraCI (see `run_traci`), reusing a still running SUMO instance if any.
+
         :param run_config: run configuration
         :param cse: central optimisation entity instance of colmto.cse.cse.SumoCSE
 
         :return: list of vehicles, containing travel stats
         '''
 
-        if not isinstance(cse, colmto.cse.cse.SumoCSE):
-            raise AttributeError('Provided CSE object is not of type SumoCSE.')
+        # contract check for internal callers (elided with python -O)
+        assert isinstance(cse, colmto.cse.cse.SumoCSE), 'Provided CSE object is not of type SumoCSE.'
+
+        # libsumo can't drive sumo-gui, hence stick to TraCI if running with GUI
+        l_traci = (_libsumo() if self._sumo_config.sumo_run_config.get('headless') else None) or traci
 
-        self._log.debug('starting sumo process')
         self._log.debug('CSE %s with rules %s', cse, cse.rules)
-        l_traci_start = traci.start(
-            [
-                self._sumo_binary,
-                '-c', run_config.get('configfile'),
-                '--gui-settings-file', run_config.get('settingsfile'),
-                '--time-to-teleport', '-1',
-                '--no-step-log'
-            ]
-        )
+        l_sumo_args = [
+            *self._sumo_base_args,
+            '-c', str(run_config.get('configfile')),
+            '--gui-settings-file', str(run_config.get('settingsfile'))
+        ]
+
+        if self._traci_backend is l_traci:
+            # SUMO is still running from a previous run: load this run's configuration into it
+            # instead of paying for a new process and connection (subscriptions are set up again below)
+            self._log.debug('reloading sumo process (%s)', l_traci.__name__)
+            l_traci.load(l_sumo_args[1:])
+        else:
+            self.close()
+            self._log.debug('starting sumo process (%s)', l_traci.__name__)
+            l_traci.start(l_sumo_args)
+            self._traci_backend = l_traci
 
         self._log.debug('subscribing to TraCI')
 
         # subscribe to global simulation vars
-        traci.simulation.subscribe(
+        l_traci.simulation.subscribe(
             (
-                traci.constants.VAR_TIME_STEP,
-                traci.constants.VAR_DEPARTED_VEHICLES_IDS,
-                traci.constants.VAR_ARRIVED_VEHICLES_IDS,
-                traci.constants.VAR_MIN_EXPECTED_VEHICLES,
+                l_traci.constants.VAR_TIME_STEP,
+                l_traci.constants.VAR_DEPARTED_VEHICLES_IDS,
+                l_traci.constants.VAR_ARRIVED_VEHICLES_IDS,
+                l_traci.constants.VAR_MIN_EXPECTED_VEHICLES,
             )
         )
 
         # subscribe to lane stats to allow CSE to 'observe' traffic
-        traci.lane.subscribe(
+        l_traci.lane.subscribe(
             '21edge_0',
             (
-                traci.constants.LAST_STEP_OCCUPANCY,
+                l_traci.constants.LAST_STEP_OCCUPANCY,
             )
         )
-        traci.lane.subscribe(
+        l_traci.lane.subscribe(
             '21edge_1',
             (
-                traci.constants.LAST_STEP_OCCUPANCY,
+                l_traci.constants.LAST_STEP_OCCUPANCY,
+            )
+        )
+
+        # subscribe to vehicle variables of all vehicles in the network at once by means of a context
+        # subscription around the start of the 2+1 segment, covering any distance (instead of subscribing
+        # to each departed vehicle individually and polling each vehicle's results).
+        # Vehicle class and maximum speed are known locally (see SUMOVehicle), hence not subscribed.
+        l_traci.junction.subscribeContext(
+            '21start',
+            l_traci.constants.CMD_GET_VEHICLE_VARIABLE,
+            1e9,
+            (
+                l_traci.constants.VAR_POSITION,
+                l_traci.constants.VAR_LANE_INDEX,
+                l_traci.constants.VAR_SPEED
             )
         )
 
         # provide CSE with traci reference
-        cse.traci(traci)
+        cse.traci(l_traci)
 
         # add polygon of otl denied positions if --gui enabled
         # and cse contains instance objects of colmto.cse.rule.SUMOPositionRule
         if self._args.gui:
-            for i_rule in cse.rules:
-                if isinstance(i_rule, colmto.cse.rule.SUMOPositionRule):
-                    traci.polygon.add(
-                        polygonID=str(i_rule),
-                        shape=(
-                            (i_rule.bounding_box.p1.x, 2 * (i_rule.bounding_box.p1.y) + 10),
-                            (i_rule.bounding_box.p2.x, 2 * (i_rule.bounding_box.p1.y) + 10),
-                            (i_rule.bounding_box.p2.x, 2 * (i_rule.bounding_box.p2.y) + 10),
-                            (i_rule.bounding_box.p1.x, 2 * (i_rule.bounding_box.p2.y) + 10)
-                        ),
-                        color=(255, 0, 0, 255),
-                        fill=True,
-                    )
+            for i_rule in cse.position_rules:
+                l_p1, l_p2 = i_rule.bounding_box
+                l_y1, l_y2 = 2 * l_p1.y + 10, 2 * l_p2.y + 10
+                l_traci.polygon.add(
+                    polygonID=str(i_rule),
+                    shape=((l_p1.x, l_y1), (l_p2.x, l_y1), (l_p2.x, l_y2), (l_p1.x, l_y2)),
+                    color=(255, 0, 0, 255),
+                    fill=True,
+                )
+
+        # bind constants and frequently called functions to locals, i.e. resolve them once instead of
+        # on each (vehicle) iteration of the main loop
+        l_var_time_step = l_traci.constants.VAR_TIME_STEP
+        l_var_departed_vehicles_ids = l_traci.constants.VAR_DEPARTED_VEHICLES_IDS
+        l_var_min_expected_vehicles = l_traci.constants.VAR_MIN_EXPECTED_VEHICLES
+        l_var_position = l_traci.constants.VAR_POSITION
+        l_var_lane_index = l_traci.constants.VAR_LANE_INDEX
+        l_var_speed = l_traci.constants.VAR_SPEED
+        l_simulation_get_subscription_results = l_traci.simulation.getSubscriptionResults
+        l_junction_get_context_subscription_results = l_traci.junction.getContextSubscriptionResults
+        l_lane_get_all_subscription_results = l_traci.lane.getAllSubscriptionResults
+        l_simulation_step = l_traci.simulationStep
+        l_vehicles = run_config['vehicles']
 
         # initial fetch of subscription results
-        l_simulation_subscription_results = traci.simulation.getSubscriptionResults()
+        l_simulation_subscription_results = l_simulation_get_subscription_results()
 
         # main loop through traci driven simulation runs
-        while l_simulation_subscription_results.get(traci.constants.VAR_MIN_EXPECTED_VEHICLES) > 0:
+        while l_simulation_subscription_results[l_var_min_expected_vehicles] > 0:
 
-            # set initial attribute start_time of newly entering vehicles
-            # and subscribe to parameters
-            for i_vehicle_id in l_simulation_subscription_results.get(traci.constants.VAR_DEPARTED_VEHICLES_IDS):
-                # set TraCI -> vehicle.start_time
-                run_config.get('vehicles').get(i_vehicle_id).start_time = l_simulation_subscription_results.get(traci.constants.VAR_TIME_STEP)/1000.
-                # subscribe to parameters
-                traci.vehicle.subscribe(
-                    i_vehicle_id, (
-                        traci.constants.VAR_POSITION,
-                        traci.constants.VAR_LANE_INDEX,
-                        traci.constants.VAR_VEHICLECLASS,
-                        traci.constants.VAR_MAXSPEED,
-                        traci.constants.VAR_SPEED
-                    )
-                )
-                # set TraCI -> vehicle.start_position
-                run_config.get('vehicles').get(i_vehicle_id).start_position = traci.vehicle.getSubscriptionResults(i_vehicle_id).get(traci.constants.VAR_POSITION)
+            # current time step in seconds, the same for all vehicles of this step
+            l_time_step = l_simulation_subscription_results[l_var_time_step]/1000.
 
+            # retrieve vehicle subscription results of all vehicles in one go
+            l_vehicle_subscription_results = l_junction_get_context_subscription_results('21start') or {}
 
-            # retrieve vehicle subscription results
-            l_vehicle_subscription_results = traci.vehicle.getSubscriptionResults()
+            # set initial attributes start_time and start_position of newly entering vehicles
+            for i_vehicle_id in l_simulation_subscription_results[l_var_departed_vehicles_ids]:
+                l_vehicle = l_vehicles[i_vehicle_id]
+                # set TraCI -> vehicle.start_time
+                l_vehicle.start_time = l_time_step
+                # set TraCI -> vehicle.start_position
+                l_vehicle.start_position = l_vehicle_subscription_results[i_vehicle_id][l_var_position]
 
             # retrieve results and update vehicle objects
             for i_vehicle_id, i_results in l_vehicle_subscription_results.items():
                 # update vehicle position, speed and pass timestep to let vehicle calculate statistics
-                run_config.get('vehicles').get(i_vehicle_id).update(
-                    i_results.get(traci.constants.VAR_POSITION),
-                    i_results.get(traci.constants.VAR_LANE_INDEX),
-                    i_results.get(traci.constants.VAR_SPEED),
-                    l_simulation_subscription_results.get(traci.constants.VAR_TIME_STEP)/1000.
+                l_vehicles[i_vehicle_id].update(
+                    i_results[l_var_position],
+                    i_results[l_var_lane_index],
+                    i_results[l_var_speed],
+                    l_time_step
                 )
 
             # BEGIN CSE protocol
             # 1. CSE observes traffic
             cse.observe_traffic(
-                traci.lane.getSubscriptionResults(),
+                l_lane_get_all_subscription_results(),
                 l_vehicle_subscription_results,
-                run_config.get('vehicles')
+                l_vehicles
             )
             # 2. apply active policy, i.e. rules on vehicles:
-            # Tell CSE to tell vehicles whether they are allowed to use OTL or not
-            for i_vehicle_id in l_vehicle_subscription_results:
-                cse.apply_one(run_config.get('vehicles').get(i_vehicle_id))
+            # Tell CSE to tell vehicles whether they are allowed to use OTL or not (as one batch per step)
+            cse.apply(l_vehicles[i_vehicle_id] for i_vehicle_id in l_vehicle_subscription_results)
             # END CSE protocol
 
-            traci.simulationStep()
+            l_simulation_step()
 
             # fetch new results for next simulation step/cycle
-            l_simulation_subscription_results = traci.simulation.getSubscriptionResults()
+            l_simulation_subscription_results = l_simulation_get_subscription_results()
 
-        traci.close()
+        # SUMO is closed or kept running for the next run by `run_traci`
 
         self._log.info(
             'TraCI run of scenario %s, run %d completed.',
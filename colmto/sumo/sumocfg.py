@@ -23,21 +23,25 @@
 # @endcond
 '''This module generates static sumo configuration files for later execution.'''
 # pylint: disable=no-member
-
-import copy
+# pylint: disable=too-many-lines
+
+import concurrent.futures
+import functools
+import hashlib
+import logging
+import multiprocessing
+import os
 from pathlib import Path
+import pickle
 import subprocess
 from types import MappingProxyType
 import typing
+from collections import Counter
 from collections import OrderedDict
+from xml.sax.saxutils import escape
 
+import lxml.etree as etree
 import numpy
-import defusedxml.lxml
-
-try:
-    import lxml.etree as etree
-except ImportError:
-    import xml.etree.ElementTree as etree
 
 from colmto.common.helper import Colour
 from colmto.common.helper import Distribution
@@ -48,6 +52,121 @@ import colmto.common.log
 import colmto.common.visualisation
 import colmto.environment.vehicle
 
+# templates of the small, fixed structure XML files, written without building an element tree
+_NODE_XML = '''<nodes>
+  <node id="enter" x="{enter}" y="0"/>
+  <node id="21start" x="0" y="0"/>
+  <node id="21end" x="{end}" y="0"/>
+  <node id="exit" x="{exit}" y="0"/>
+</nodes>
+'''
+_CONFIG_XML = '''<configuration>
+  <input>
+    <net-file value="{netfile}"/>
+    <route-files value="{routefile}"/>
+    <gui-settings-file value="{settingsfile}"/>
+  </input>
+  <time>
+    <begin value="{begin}"/>
+  </time>
+</configuration>
+'''
+_SETTINGS_XML = '''<viewsettings>
+  <viewport x="0" y="0" zoom="100"/>
+  <delay value="{delay}"/>
+</viewsettings>
+'''
+
+
+def _xml_attribute(value) -> str:
+    '''
+    Escape value for use as XML attribute in the templates above.
+
+    :param value: attribute value
+    :return: escaped string
+    '''
+    return escape(str(value), {'"': '&quot;'})
+
+
+def _inputs_hash(inputfiles: typing.Iterable[Path], binary) -> str:
+    '''
+    Hash the contents of a SUMO tool's input files along with the tool itself,
+    to tell whether the tool's output is still up to date.
+
+    :param inputfiles: input files of tool
+    :param binary: tool binary
+    :return: hex digest
+    '''
+    l_hash = hashlib.sha1(str(binary).encode('utf8'))
+    for i_inputfile in inputfiles:
+        with open(i_inputfile, 'rb') as f_input:
+            for i_chunk in iter(functools.partial(f_input.read, 65536), b''):
+                l_hash.update(i_chunk)
+    return l_hash.hexdigest()
+
+
+def _load_vehicles(vehiclesfile: Path, config) -> typing.Optional[dict]:
+    '''
+    Load the pickled vehicles of an existing run, if they were drawn from the same configuration,
+    as recorded along with the pickle's contents in its hash file (`<vehiclesfile>.inputhash`).
+
+    :param vehiclesfile: pickled vehicles of run
+    :param config: configuration the vehicles of the run are drawn from
+    :return: vehicles, None if missing, outdated or not written by `_dump_vehicles`
+    '''
+    # read files right away instead of checking for their existence first
+    try:
+        l_recordedhash = Path(f'{vehiclesfile}.inputhash').read_text()
+        l_vehicles = vehiclesfile.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    # only unpickle what was pickled for this very configuration
+    if l_recordedhash != _vehicles_hash(l_vehicles, config):
+        return None
+
+    return pickle.loads(l_vehicles)
+
+
+def _dump_vehicles(vehicles: dict, vehiclesfile: Path, config):
+    '''
+    Pickle the vehicles of a run and record their hash along with the configuration they were drawn from
+    (see `_load_vehicles`).
+
+    :param vehicles: vehicles of run
+    :param vehiclesfile: destination of pickled vehicles
+    :param config: configuration the vehicles of the run are drawn from
+    '''
+    l_vehicles = pickle.dumps(vehicles, protocol=pickle.HIGHEST_PROTOCOL)
+    vehiclesfile.write_bytes(l_vehicles)
+    Path(f'{vehiclesfile}.inputhash').write_text(_vehicles_hash(l_vehicles, config))
+
+
+def _vehicles_hash(vehicles: bytes, config) -> str:
+    '''
+    Hash pickled vehicles along with the configuration they were drawn from.
+
+    :param vehicles: pickled vehicles
+    :param config: configuration the vehicles are drawn from
+    :return: hex digest
+    '''
+    l_hash = hashlib.sha1(repr(config).encode('utf8'))
+    l_hash.update(vehicles)
+    return l_hash.hexdigest()
+
+
+# run config entries the vehicles of a run are drawn from (see `_create_vehicle_distribution`)
+_VEHICLES_RUN_CONFIG_KEYS = (
+    'aadt', 'cooperation_probability', 'entrylanepercent', 'gridcellwidth', 'onlyoneotlsegment',
+    'starttimedistribution', 'vehiclespersecond', 'vtypedistribution'
+)
+
+# vehicle properties which only describe a single vehicle, i.e. are no attributes of its SUMO vType
+_PER_VEHICLE_PROPERTIES = frozenset(('sumo_id', 'start_time'))
+
+# vType attributes which differ between vehicles of the same vehicle type
+_PER_VEHICLE_VTYPE_ATTRIBUTES = ('normal_colour', 'maxSpeed', 'cooperation_disposition')
+
 
 class SumoConfig(colmto.common.configuration.Configuration):
     '''Create SUMO configuration files'''
@@ -60,16 +179,21 @@ class SumoConfig(colmto.common.configuration.Configuration):
         self._writer = colmto.common.io.Writer(args)
 
         # initialise numpy PRNG
-        self._prng = numpy.random.RandomState()
+        self._prng = numpy.random.default_rng()
 
         self._binaries = {
             'netconvert': netconvertbinary,
             'duarouter': duarouterbinary
         }
 
-        self.sumo_config_dir.mkdir(parents=True, exist_ok=True)
-        self.runsdir.mkdir(parents=True, exist_ok=True)
-        self.resultsdir.mkdir(parents=True, exist_ok=True)
+        # directories known to exist, including their parents
+        self._created_dirs: typing.Set[Path] = set()
+        # input hash files of started SUMO tools, written once they finished successfully
+        self._pending_inputhashes: typing.Dict[subprocess.Popen, typing.Tuple[Path, str]] = {}
+
+        # sumo_config_dir is the common parent of runsdir and resultsdir, hence gets created along with them
+        self._mkdir(self.runsdir)
+        self._mkdir(self.resultsdir)
 
         if self._args.forcerebuildscenarios:
             self._log.debug(
@@ -77,6 +201,18 @@ class SumoConfig(colmto.common.configuration.Configuration):
                 '-> rebuilding/overwriting scenarios if already present'
             )
 
+    def __setstate__(self, state: dict):
+        '''
+        Restore state, e.g. in worker processes of `generate_runs`, and re-create the logger's handlers, which a
+        pickled logger does not carry into freshly spawned processes.
+
+        :param state: state
+        '''
+        self.__dict__.update(state)
+        self._log = colmto.common.log.logger(
+            __name__, self._args.loglevel, self._args.quiet, self._args.logfile
+        )
+
     @property
     def sumo_config_dir(self) -> Path:
         '''
@@ -99,13 +235,23 @@ class SumoConfig(colmto.common.configuration.Configuration):
         return self.output_dir / 'SUMO' / self.run_prefix / 'results'
 
     @property
-    def sumo_run_config(self):
+    def sumo_run_config(self) -> MappingProxyType:
         '''
-        :return: copy of sumo run config
+        :return: read-only view of sumo run config
         '''
-        return copy.copy(
-            self.run_config.get('sumo')
-        )
+        return MappingProxyType(self.run_config.get('sumo'))
+
+    def _mkdir(self, directory: Path):
+        '''
+        Create directory including its parents, unless it is already known to exist.
+
+        :param directory: directory to create
+        '''
+        if directory in self._created_dirs:
+            return
+        directory.mkdir(parents=True, exist_ok=True)
+        self._created_dirs.add(directory)
+        self._created_dirs.update(directory.parents)
 
     def generate_scenario(self, scenarioname):
         '''generate SUMO scenario based on scenario name'''
@@ -113,7 +259,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
         self._log.debug('Generating scenario %s', scenarioname)
 
         l_destinationdir = self.runsdir / scenarioname
-        l_destinationdir.mkdir(parents=True, exist_ok=True)
+        self._mkdir(l_destinationdir)
 
         l_scenarioconfig = self.scenario_config.get(scenarioname)
 
@@ -134,12 +280,14 @@ class SumoConfig(colmto.common.configuration.Configuration):
         self._generate_edge_xml(
             scenarioname, l_scenarioconfig, l_edgefile, self._args.forcerebuildscenarios
         )
+        l_netconvertprocess = self._generate_net_xml(
+            l_nodefile, l_edgefile, l_netfile, self._args.forcerebuildscenarios
+        )
+        # netconvert runs in the background meanwhile
         self._generate_settings_xml(
             self.run_config, l_settingsfile, self._args.forcerebuildscenarios
         )
-        self._generate_net_xml(
-            l_nodefile, l_edgefile, l_netfile, self._args.forcerebuildscenarios
-        )
+        self._wait_for_process(l_netconvertprocess)
 
         return l_scenarioruns
 
@@ -157,47 +305,80 @@ class SumoConfig(colmto.common.configuration.Configuration):
         :return: run configuration dictionary
 
         '''
-        self._log.debug(
-            'Generating run %s for %s sorting', run_number, initial_sorting.name.lower()
+
+        l_run_config, l_duarouterprocess = self._generate_run(
+            scenario_run_config, initial_sorting, run_number, vtype_list
         )
-        l_scenarioname: str = scenario_run_config.get('scenarioname')
+        self._wait_for_process(l_duarouterprocess)
 
-        l_destinationdir = self.runsdir / l_scenarioname
+        return l_run_config
 
-        (l_destinationdir / initial_sorting.name.lower()).mkdir(parents=True, exist_ok=True)
+    def _generate_run(
+            self,
+            scenario_run_config: dict,
+            initial_sorting: InitialSorting,
+            run_number: int,
+            vtype_list: list) -> typing.Tuple[dict, typing.Optional[subprocess.Popen]]:
+        '''generate run configurations, but leave duarouter running in the background.
+        The route file of the run is complete once the returned process was waited for (see `_wait_for_process`).
 
-        (l_destinationdir / initial_sorting.name.lower() / str(run_number))\
-            .mkdir(parents=True, exist_ok=True)
+        :param scenario_run_config: run configuration of scenario
+        :param initial_sorting: initial sorting of vehicles (InitialSorting enum)
+        :param run_number: number of current run
+        :return: tuple of run configuration dictionary and duarouter process (None if route file is up to date)
 
+        '''
+        l_sortingname = initial_sorting.name.lower()
         self._log.debug(
-            'Generating SUMO run configuration for scenario %s / sorting %s / run %d',
-            l_scenarioname, initial_sorting.name, run_number
+            'Generating run %s for %s sorting', run_number, l_sortingname
         )
+        l_scenarioname: str = scenario_run_config.get('scenarioname')
 
-        l_tripfile = l_destinationdir / initial_sorting.name.lower() / str(run_number) \
-                     / f'{l_scenarioname}.trip.xml'
+        # relative directory of this run, below the runs and results directories
+        l_runpath = Path(l_scenarioname) / l_sortingname / str(run_number)
+        l_destinationdir = self.runsdir / l_runpath
+        self._mkdir(l_destinationdir)
 
-        l_routefile = l_destinationdir / initial_sorting.name.lower() / str(run_number) \
-                      / f'{l_scenarioname}.rou.xml'
+        self._log.debug(
+            'Generating SUMO run configuration for scenario %s / sorting %s / run %d',
+            l_scenarioname, initial_sorting.name, run_number
+        )
 
-        l_configfile = l_destinationdir / initial_sorting.name.lower() / str(run_number) \
-                       / f'{l_scenarioname}.sumo.cfg'
+        l_tripfile = l_destinationdir / f'{l_scenarioname}.trip.xml'
+        l_routefile = l_destinationdir / f'{l_scenarioname}.rou.xml'
+        l_configfile = l_destinationdir / f'{l_scenarioname}.sumo.cfg'
+        # vehicles of the trip file, to restore them when reusing existing run files
+        l_vehiclesfile = l_destinationdir / f'{l_scenarioname}.vehicles.pickle'
 
         # create output dirs for fcd results if not running with cse enabled, i.e. stand alone
         if not self.run_config.get('cse-enabled'):
-            (
-                self.resultsdir / l_scenarioname / initial_sorting.name.lower() / str(run_number)
-            ).mkdir(parents=True, exist_ok=True)
+            self._mkdir(self.resultsdir / l_runpath)
 
-        l_runcfgfiles = [l_tripfile, l_routefile, l_configfile]
-
-        if [i_fname for i_fname in l_runcfgfiles if not i_fname.exists()]:
+        if not self._args.forcerebuildscenarios \
+                and not all(i_fname.exists() for i_fname in (l_tripfile, l_routefile, l_configfile, l_vehiclesfile)):
             self._log.debug(
                 'Incomplete/non-existing SUMO run configuration for %s, %s, %d -> (re)building',
                 l_scenarioname, initial_sorting.name, run_number
             )
             self._args.forcerebuildscenarios = True
 
+        # configuration the vehicles are drawn from, to tell whether the vehicles of existing run files are outdated
+        l_vehicles_config = (
+            self.scenario_config.get(l_scenarioname),
+            {i_key: self.run_config.get(i_key) for i_key in _VEHICLES_RUN_CONFIG_KEYS},
+            self.vtypes_config,
+            initial_sorting.name,
+            list(vtype_list)
+        )
+
+        l_vehicles = None if self._args.forcerebuildscenarios else _load_vehicles(l_vehiclesfile, l_vehicles_config)
+        if not self._args.forcerebuildscenarios and l_vehicles is None:
+            self._log.debug(
+                'Outdated SUMO run configuration for %s, %s, %d -> (re)building',
+                l_scenarioname, initial_sorting.name, run_number
+            )
+            self._args.forcerebuildscenarios = True
+
         self._generate_config_xml(
             {
                 'configfile': l_configfile,
@@ -208,12 +389,14 @@ class SumoConfig(colmto.common.configuration.Configuration):
             self.run_config.get('simtimeinterval'), self._args.forcerebuildscenarios
         )
 
-        l_vehicles = self._generate_trip_xml(
-            scenario_run_config, initial_sorting, vtype_list, l_tripfile,
-            self._args.forcerebuildscenarios
-        )
+        if self._args.forcerebuildscenarios:
+            l_vehicles = self._generate_trip_xml(
+                scenario_run_config, initial_sorting, vtype_list, l_tripfile,
+                self._args.forcerebuildscenarios
+            )
+            _dump_vehicles(l_vehicles, l_vehiclesfile, l_vehicles_config)
 
-        self._generate_route_xml(
+        l_duarouterprocess = self._generate_route_xml(
             scenario_run_config.get('netfile'), l_tripfile, l_routefile,
             self._args.forcerebuildscenarios
         )
@@ -227,14 +410,98 @@ class SumoConfig(colmto.common.configuration.Configuration):
             'tripfile': l_tripfile,
             'routefile': l_routefile,
             'configfile': l_configfile,
-            'fcdfile': self.resultsdir /
-                       l_scenarioname /
-                       initial_sorting.name.lower() /
-                       str(run_number) /
-                       f'{l_scenarioname}.fcd-output.xml' if not self.run_config.get('cse-enabled') else None,
-            'initialsorting': initial_sorting.name.lower(),
+            'fcdfile': self.resultsdir / l_runpath / f'{l_scenarioname}.fcd-output.xml'
+                       if not self.run_config.get('cse-enabled') else None,
+            'initialsorting': l_sortingname,
             'scenario_config': self.scenario_config.get(l_scenarioname)
-        }
+        }, l_duarouterprocess
+
+    def generate_runs(
+            self,
+            scenario_run_config: dict,
+            initial_sorting: InitialSorting,
+            run_numbers: typing.Sequence[int],
+            vtype_list: list,
+            workers: typing.Optional[int] = None) -> typing.List[dict]:
+        '''generate run configurations of several independent runs (see `generate_run`) in parallel.
+        Each run draws the speeds of its vehicles from an own PRNG stream, jumped ahead of this configuration's PRNG,
+        as otherwise all workers would start from the same (copied) PRNG state.
+        The streams do not depend on the number of workers, i.e. the same PRNG state draws the same speeds
+        whether the runs are generated in parallel or, with only one worker, sequentially in this process,
+        and whether they are generated by one call or by consecutive calls.
+
+        :param scenario_run_config: run configuration of scenario
+        :param initial_sorting: initial sorting of vehicles (InitialSorting enum)
+        :param run_numbers: numbers of runs to generate
+        :param vtype_list: list of vehicle types
+        :param workers: maximum number of worker processes (default: number of CPUs)
+        :return: list of run configuration dictionaries in order of the given run numbers
+
+        '''
+
+        l_workers = min(workers or os.cpu_count() or 1, len(run_numbers))
+
+        # each run draws from its own non-overlapping PRNG stream, jumped ahead of the current one by the run's
+        # position, while this PRNG continues behind all of them, i.e. with the next call's first stream
+        l_bit_generator = self._prng.bit_generator
+        l_run_bit_generators = [l_bit_generator.jumped(i_jumps) for i_jumps in range(len(run_numbers))]
+        l_prng = numpy.random.Generator(l_bit_generator.jumped(len(run_numbers)))
+
+        if l_workers <= 1:
+            # let duarouter of each run work in the background while the next run gets generated
+            l_run_configs = []
+            l_duarouterprocess = None
+            for i_run, i_run_bit_generator in zip(run_numbers, l_run_bit_generators):
+                self._prng = numpy.random.Generator(i_run_bit_generator)
+                l_run_config, l_next_duarouterprocess = self._generate_run(
+                    scenario_run_config, initial_sorting, i_run, vtype_list
+                )
+                self._wait_for_process(l_duarouterprocess)
+                l_duarouterprocess = l_next_duarouterprocess
+                l_run_configs.append(l_run_config)
+            self._prng = l_prng
+            self._wait_for_process(l_duarouterprocess)
+            return l_run_configs
+
+        self._log.debug('generating %d runs with %d worker processes', len(run_numbers), l_workers)
+
+        self._prng = l_prng
+
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=l_workers,
+                mp_context=multiprocessing.get_context('spawn')
+        ) as l_executor:
+            return list(
+                l_executor.map(
+                    self._generate_seeded_run,
+                    l_run_bit_generators,
+                    (scenario_run_config,) * len(run_numbers),
+                    (initial_sorting,) * len(run_numbers),
+                    run_numbers,
+                    (vtype_list,) * len(run_numbers)
+                )
+            )
+
+    def _generate_seeded_run(
+            self,
+            bit_generator: numpy.random.BitGenerator,
+            scenario_run_config: dict,
+            initial_sorting: InitialSorting,
+            run_number: int,
+            vtype_list: list) -> dict:
+        '''generate run configuration (see `generate_run`) with its own PRNG stream, i.e. in a worker process
+
+        :param bit_generator: bit generator of the run's PRNG stream
+        :param scenario_run_config: run configuration of scenario
+        :param initial_sorting: initial sorting of vehicles (InitialSorting enum)
+        :param run_number: number of current run
+        :param vtype_list: list of vehicle types
+        :return: run configuration dictionary
+
+        '''
+
+        self._prng = numpy.random.Generator(bit_generator)
+        return self.generate_run(scenario_run_config, initial_sorting, run_number, vtype_list)
 
     def _generate_node_xml(self, scenarioconfig, nodefile: Path, forcerebuildscenarios=False):
         '''
@@ -246,54 +513,33 @@ class SumoConfig(colmto.common.configuration.Configuration):
 
         '''
 
-        if Path(nodefile).exists() and not forcerebuildscenarios:
+        if not forcerebuildscenarios and Path(nodefile).exists():
             return
 
         self._log.debug('Generating node xml')
 
         # parameters
-        l_length: float = scenarioconfig.get('parameters').get('length')
-        l_nbswitches: int = scenarioconfig.get('parameters').get('switches')
+        l_parameters: dict = scenarioconfig.get('parameters')
+        l_length: float = l_parameters.get('length')
+        l_nbswitches: int = l_parameters.get('switches')
         l_segmentlength = l_length / (l_nbswitches + 1)
 
         if self._run_config.get('onlyoneotlsegment'):     # for only one 2+1 segment, the
             l_length = l_segmentlength + 0.1 # total length is just one segment
                                              # (plus 10cm to fix an issue with SUMO joining the lanes)
 
-        l_nodes = etree.Element('nodes')
-        etree.SubElement(
-            # add a configurable percentage of segment length as entry lane
-            l_nodes, 'node', attrib={
-                'id': 'enter',
-                'x': str(-self.run_config.get('entrylanepercent')/100. * l_segmentlength), 'y': '0'
-            }
-        )
-        etree.SubElement(
-            l_nodes, 'node', attrib={'id': '21start', 'x': '0', 'y': '0'}
-        )
-        etree.SubElement(
-            l_nodes, 'node', attrib={'id': '21end', 'x': str(l_length), 'y': '0'}
-        )
-
-        # dummy node for easier from-to routing
-        # add ```entrylanepercent``` of segment length as exit lane
-        etree.SubElement(
-            l_nodes,
-            'node',
-            attrib={
-                'id': 'exit',
-                'x': str(
-                    l_length + 0.1
-                    if l_nbswitches % 2 == 1 and not self._run_config.get('onlyoneotlsegment')
-                    else l_length + self.run_config.get('entrylanepercent')/100. * l_segmentlength
-                ),
-                'y': '0'
-            }
-        )
-
         with open(nodefile, 'w') as f_nodesxml:
             f_nodesxml.write(
-                defusedxml.lxml.tostring(l_nodes, pretty_print=True, encoding='unicode')
+                _NODE_XML.format(
+                    # add a configurable percentage of segment length as entry lane
+                    enter=-self.run_config.get('entrylanepercent')/100. * l_segmentlength,
+                    end=l_length,
+                    # dummy node for easier from-to routing
+                    # add ```entrylanepercent``` of segment length as exit lane
+                    exit=l_length + 0.1
+                    if l_nbswitches % 2 == 1 and not self._run_config.get('onlyoneotlsegment')
+                    else l_length + self.run_config.get('entrylanepercent')/100. * l_segmentlength
+                )
             )
 
     def _generate_edge_xml(
@@ -308,15 +554,17 @@ class SumoConfig(colmto.common.configuration.Configuration):
                                         even if they already exist for current run
         '''
 
-        if Path(edgefile).exists() and not forcerebuildscenarios:
+        if not forcerebuildscenarios and Path(edgefile).exists():
             return
 
         self._log.debug('Generating edge xml for %s', scenario_name)
 
         # parameters
-        l_length: float = scenario_config.get('parameters').get('length')
-        l_nbswitches: int = scenario_config.get('parameters').get('switches')
-        l_maxspeed: float = scenario_config.get('parameters').get('speedlimit')
+        l_parameters: dict = scenario_config.get('parameters')
+        l_length: float = l_parameters.get('length')
+        l_nbswitches: int = l_parameters.get('switches')
+        # speed limit of all edges, as attribute string
+        l_maxspeed = str(l_parameters.get('speedlimit'))
 
         # assume even distributed otl segment lengths
         l_segmentlength = l_length / (l_nbswitches + 1)
@@ -333,7 +581,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
                 'from': 'enter',
                 'to': '21start',
                 'numLanes': '1',
-                'speed': str(l_maxspeed)
+                'speed': l_maxspeed
             }
         )
 
@@ -347,7 +595,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
                     'to': '21end',
                     'numLanes': '2',
                     'spreadType': 'center',
-                    'speed': str(l_maxspeed)
+                    'speed': l_maxspeed
                 }
             )
             # Exit lane
@@ -360,7 +608,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
                     'to': 'exit',
                     'numLanes': '1',
                     'spreadType': 'right',
-                    'speed': str(l_maxspeed)
+                    'speed': l_maxspeed
                 }
             )
             etree.SubElement(
@@ -369,7 +617,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
                 attrib={
                     'pos': str(int(l_segmentlength)-1),
                     'lanes': '0',
-                    'speed': str(scenario_config.get('parameters').get('speedlimit'))
+                    'speed': l_maxspeed
                 }
             )
 
@@ -384,7 +632,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
                     'to': '21end',
                     'numLanes': '2',
                     'spreadType': 'center',
-                    'speed': str(l_maxspeed)
+                    'speed': l_maxspeed
                 }
             )
 
@@ -400,14 +648,11 @@ class SumoConfig(colmto.common.configuration.Configuration):
                     'to': 'exit',
                     'numLanes': '1',
                     'spreadType': 'right',
-                    'speed': str(l_maxspeed)
+                    'speed': l_maxspeed
                 }
             )
 
-        with open(edgefile, 'w') as f_edgexml:
-            f_edgexml.write(
-                defusedxml.lxml.tostring(l_edges, pretty_print=True, encoding='unicode')
-            )
+        etree.ElementTree(l_edges).write(str(edgefile), pretty_print=True, encoding='utf-8')
 
     def _generate_switches(self, edge, scenario_config):
         '''
@@ -418,52 +663,36 @@ class SumoConfig(colmto.common.configuration.Configuration):
         '''
         self._log.debug('generating switches')
 
-        l_length: float = scenario_config.get('parameters').get('length')
-        l_nbswitches: int = scenario_config.get('parameters').get('switches')
-        l_segmentlength = l_length / (l_nbswitches + 1)
         l_parameters: dict = scenario_config.get('parameters')
+        l_length: float = l_parameters.get('length')
+        l_nbswitches: int = l_parameters.get('switches')
+        l_segmentlength = l_length / (l_nbswitches + 1)
+        l_speedlimit = str(l_parameters.get('speedlimit'))
 
         if isinstance(l_parameters.get('switchpositions'), (list, tuple)):
-            # add splits and joins
-            l_add_otl_lane = True
-            for i_segmentpos in l_parameters.get('switchpositions') \
-                    if not self._run_config.get('onlyoneotlsegment') else l_parameters.get('switchpositions')[:2]:
-                etree.SubElement(
-                    edge,
-                    'split',
-                    attrib={
-                        'pos': str(i_segmentpos),
-                        'lanes': '0 1' if l_add_otl_lane else '0',
-                        'speed': str(scenario_config.get('parameters').get('speedlimit'))
-                    }
-                )
-
-                l_add_otl_lane ^= True
+            l_switchpositions = l_parameters.get('switchpositions') \
+                if not self._run_config.get('onlyoneotlsegment') else l_parameters.get('switchpositions')[:2]
         else:
             self._log.info('Rebuilding switches')
-            scenario_config.get('parameters')['switchpositions'] = []
-            # compute and add splits and joins
-            l_add_otl_lane = True
-            for i_segmentpos in range(0, int(l_length), int(l_segmentlength)) \
-                    if not self._run_config.get('onlyoneotlsegment') \
-                    else range(0, int(2 * l_segmentlength - 1), int(l_segmentlength)):
-                etree.SubElement(
-                    edge,
-                    'split',
-                    attrib={
-                        'pos': str(i_segmentpos),
-                        'lanes': '0 1' if l_add_otl_lane else '0',
-                        'speed': str(scenario_config.get('parameters').get('speedlimit'))
-                    }
-                )
-
-                scenario_config.get(
-                    'parameters'
-                ).get(
-                    'switchpositions'
-                ).append(i_segmentpos)
+            # compute splits and joins
+            l_switchpositions = l_parameters['switchpositions'] = list(
+                range(0, int(l_length), int(l_segmentlength))
+                if not self._run_config.get('onlyoneotlsegment')
+                else range(0, int(2 * l_segmentlength - 1), int(l_segmentlength))
+            )
 
-                l_add_otl_lane ^= True
+        # add splits and joins, i.e. alternately add and remove the OTL
+        l_lanes = ('0 1', '0')
+        for i, i_segmentpos in enumerate(l_switchpositions):
+            etree.SubElement(
+                edge,
+                'split',
+                attrib={
+                    'pos': str(i_segmentpos),
+                    'lanes': l_lanes[i % 2],
+                    'speed': l_speedlimit
+                }
+            )
 
     @staticmethod
     def _generate_config_xml(config_files: dict, simtimeinterval, forcerebuildscenarios=False):
@@ -482,39 +711,16 @@ class SumoConfig(colmto.common.configuration.Configuration):
         if not len(simtimeinterval) == 2:
             raise ValueError
 
-        if config_files.get('configfile').exists() and not forcerebuildscenarios:
+        if not forcerebuildscenarios and config_files.get('configfile').exists():
             return
 
-        l_configuration = etree.Element('configuration')
-        l_input = etree.SubElement(l_configuration, 'input')
-        etree.SubElement(
-            l_input,
-            'net-file',
-            attrib={'value': str(config_files.get('netfile'))}
-        )
-        etree.SubElement(
-            l_input,
-            'route-files',
-            attrib={'value': str(config_files.get('routefile'))}
-        )
-        etree.SubElement(
-            l_input,
-            'gui-settings-file',
-            attrib={'value': str(config_files.get('settingsfile'))}
-        )
-        l_time = etree.SubElement(l_configuration, 'time')
-        etree.SubElement(
-            l_time,
-            'begin',
-            attrib={'value': str(simtimeinterval[0])}
-        )
-
         with open(config_files.get('configfile'), 'w') as f_configxml:
             f_configxml.write(
-                defusedxml.lxml.tostring(
-                    l_configuration,
-                    pretty_print=True,
-                    encoding='unicode'
+                _CONFIG_XML.format(
+                    netfile=_xml_attribute(config_files.get('netfile')),
+                    routefile=_xml_attribute(config_files.get('routefile')),
+                    settingsfile=_xml_attribute(config_files.get('settingsfile')),
+                    begin=_xml_attribute(simtimeinterval[0])
                 )
             )
 
@@ -529,27 +735,12 @@ class SumoConfig(colmto.common.configuration.Configuration):
         :param forcerebuildscenarios: Rebuild scenarios,
                                         even if they already exist for current run
         '''
-        if Path(settingsfile).exists() and not forcerebuildscenarios:
+        if not forcerebuildscenarios and Path(settingsfile).exists():
             return
 
-        l_viewsettings = etree.Element('viewsettings')
-        etree.SubElement(
-            l_viewsettings, 'viewport',
-            attrib={'x': '0',
-                    'y': '0',
-                    'zoom': '100'}
-        )
-        etree.SubElement(
-            l_viewsettings, 'delay', attrib={'value': str(runcfg.get('sumo').get('gui-delay'))}
-        )
-
-        with open(settingsfile, 'w') as f_configxml:
-            f_configxml.write(
-                defusedxml.lxml.tostring(
-                    l_viewsettings,
-                    pretty_print=True,
-                    encoding='unicode'
-                )
+        with open(settingsfile, 'w') as f_settingsxml:
+            f_settingsxml.write(
+                _SETTINGS_XML.format(delay=_xml_attribute(runcfg.get('sumo').get('gui-delay')))
             )
 
     def _create_vehicle_distribution(self,
@@ -571,58 +762,77 @@ class SumoConfig(colmto.common.configuration.Configuration):
         if not isinstance(initialsorting, InitialSorting):
             raise ValueError
 
-        self._log.debug(
-            'Create vehicle distribution with %s', self._run_config.get('vtypedistribution')
-        )
+        l_vtypedistribution = self._run_config.get('vtypedistribution')
+        self._log.debug('Create vehicle distribution with %s', l_vtypedistribution)
+
+        vtype_list = list(vtype_list)
+        l_parameters = self.scenario_config.get(scenario_name).get('parameters')
+
+        # environment is the same for all vehicles, i.e. (first segment of) road incl. entry lane and its grid
+        l_length = (1 + self._run_config.get('entrylanepercent') / 100.) * l_parameters.get('length')
+        if self._run_config.get('onlyoneotlsegment'):
+            l_length /= l_parameters.get('switches') + 1
+        l_environment = {
+            'length': l_length,
+            'gridcellwidth': self._run_config.get('gridcellwidth'),
+            'gridlength': int(round(l_length / self._run_config.get('gridcellwidth')))
+        }
+        l_cooperation_probability = self.run_config.get('cooperation_probability')
+
+        # draw maximum speeds of all vehicles of a vehicle type at once,
+        # i.e. draw indices into the desired speeds, which is what `choice` does without the input validation,
+        # and look up the vehicle type's remaining arguments only once
+        l_speeds_max = {}
+        l_vtype_arguments = {}
+        for i_vtype, i_count in Counter(vtype_list).items():
+            l_vtype_cfg = l_vtypedistribution.get(i_vtype)
+            l_desired_speeds = numpy.asarray(l_vtype_cfg.get('desiredSpeeds'), dtype=numpy.float64)
+            l_speeds = l_desired_speeds[self._prng.integers(len(l_desired_speeds), size=i_count)]
+            numpy.minimum(l_speeds, l_parameters.get('speedlimit'), out=l_speeds)
+            l_speeds_max[i_vtype] = iter(l_speeds.tolist())
+            l_vtype_arguments[i_vtype] = {
+                'vehicle_type': i_vtype,
+                'vtype_sumo_cfg': self.vtypes_config.get(i_vtype),
+                'speed_deviation': l_vtype_cfg.get('speedDev'),
+                'sigma': l_vtype_cfg.get('sigma'),
+                'cooperation_probability': l_cooperation_probability
+            }
 
         l_vehicle_list = [
             colmto.environment.vehicle.SUMOVehicle(
-                vehicle_type=vtype,
-                vtype_sumo_cfg=self.vtypes_config.get(vtype),
-                speed_deviation=self._run_config.get('vtypedistribution').get(vtype).get('speedDev'),
-                sigma=self._run_config.get('vtypedistribution').get(vtype).get('sigma'),
-                speed_max=min(
-                    self._prng.choice(
-                        self._run_config.get('vtypedistribution').get(vtype).get('desiredSpeeds')
-                    ),
-                    self.scenario_config.get(scenario_name).get('parameters').get('speedlimit')
-                ),
-                environment={
-                    'length': (1 + self._run_config.get('entrylanepercent') / 100.) * self.scenario_config.get(scenario_name).get('parameters').get('length')
-                              if not self._run_config.get('onlyoneotlsegment')
-                              else (1 + self._run_config.get('entrylanepercent') / 100.) * self.scenario_config.get(scenario_name).get('parameters').get('length') / (self.scenario_config.get(scenario_name).get('parameters').get('switches') + 1),
-                    'gridcellwidth': self._run_config.get('gridcellwidth'),
-                    'gridlength': int(round((1 + self._run_config.get('entrylanepercent') / 100.) * self.scenario_config.get(scenario_name).get('parameters').get('length') / self._run_config.get('gridcellwidth')))
-                                  if not self._run_config.get('onlyoneotlsegment')
-                                  else int(round((1 + self._run_config.get('entrylanepercent') / 100.) * (self.scenario_config.get(scenario_name).get('parameters').get('length') / (self.scenario_config.get(scenario_name).get('parameters').get('switches')+1)) / self._run_config.get('gridcellwidth')))
-                },
-                cooperation_probability=self.run_config.get('cooperation_probability')
+                speed_max=next(l_speeds_max[vtype]),
+                environment=dict(l_environment),
+                **l_vtype_arguments[vtype]
             ) for vtype in vtype_list
         ]  # type: typing.List[colmto.environment.vehicle.SUMOVehicle]
 
         # sort speeds according to initial sorting flag
         initialsorting.order(l_vehicle_list)
 
+        # resolve start time distribution and speed limit once instead of per vehicle
+        l_distribution = Distribution[self.run_config.get('starttimedistribution').upper()]
+        l_speedlimit = int(l_parameters.get('speedlimit'))
+
+        # draw start times of all vehicles at once
+        l_vehiclespersecond = self._run_config.get('vehiclespersecond')
+        l_start_times = l_distribution.timesteps(
+            aadt / (24 * 60 * 60) if not l_vehiclespersecond.get('enabled') else l_vehiclespersecond.get('value'),
+            len(l_vehicle_list)
+        ).tolist()
+
+        # colours depending on maximum speed of vehicles
+        l_normal_colours = Colour.map_all(
+            'plasma', l_speedlimit, (int(i_vehicle.speed_max) for i_vehicle in l_vehicle_list), 255.
+        )
+
         # assign a new id according to sort order and starting time to each vehicle
         l_vehicles = OrderedDict()
-        for i, i_vehicle in enumerate(l_vehicle_list):
-            # update colours depending on maximum speed of vehicles
-            i_vehicle.normal_colour = Colour.map(
-                'plasma',
-                int(self.scenario_config.get(scenario_name).get('parameters').get('speedlimit')),
-                int(i_vehicle.speed_max)
-            ) * 255.
-            # update start time
-            i_vehicle.start_time = Distribution[
-                self.run_config.get('starttimedistribution').upper()
-            ].next_timestep(
-                aadt / (24 * 60 * 60)
-                if not self._run_config.get('vehiclespersecond').get('enabled')
-                else self._run_config.get('vehiclespersecond').get('value'),
-                l_vehicle_list[i - 1].start_time if i > 0 else 0
-            )
-            i_vehicle.sumo_id = f'vehicle_{i:0>4}'
-            l_vehicles[f'vehicle_{i:0>4}'] = i_vehicle
+        for i, (i_vehicle, i_start_time, i_normal_colour) in enumerate(
+                zip(l_vehicle_list, l_start_times, l_normal_colours)):
+            i_vehicle.normal_colour = i_normal_colour
+            i_vehicle.start_time = i_start_time
+            i_vehicle.sumo_id = l_sumo_id = f'vehicle_{i:0>4}'
+            l_vehicles[l_sumo_id] = i_vehicle
 
         return l_vehicles
 
@@ -658,7 +868,7 @@ class SumoConfig(colmto.common.configuration.Configuration):
         :return: vehicles
         '''
 
-        if Path(tripfile).exists() and not forcerebuildscenarios:
+        if not forcerebuildscenarios and tripfile.exists():
             return OrderedDict({})
         self._log.debug('Generating trip xml for %s', scenario_runs.get('scenarioname'))
 
@@ -674,122 +884,229 @@ class SumoConfig(colmto.common.configuration.Configuration):
             scenario_runs.get('scenarioname')
         )
 
-        # xml
-        l_trips = etree.Element('trips')
-
-        # create a sumo vehicle_type for each vehicle
-        for i_vid, i_vehicle in l_vehicles.items():
-
-            # filter for relevant attributes and transform to string
-            l_vattr = {k: str(v) for k, v in i_vehicle.properties.items()}
-            l_vattr.update({
-                'id': str(i_vid),
-                'colour': f'{i_vehicle.colour.red/255.},'
-                          f'{i_vehicle.colour.green/255.},'
-                          f'{i_vehicle.colour.blue/255.},'
-                          f'{i_vehicle.colour.alpha/255.}'
-            })
-
-            # override parameters speedDev, desiredSpeed, and length if defined in run config
-            if self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('speedDev') is not None:
-                l_vattr['speedDev'] = str(self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('speedDev'))
-
-            if self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('sigma') is not None:
-                l_vattr['sigma'] = str(self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('sigma'))
-
-            if self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('length') is not None:
-                l_vattr['length'] = str(self.run_config.get('vtypedistribution').get(l_vattr.get('vType')).get('length'))
-
-            l_vattr['speedlimit'] = str(i_vehicle.speed_max)
-            l_vattr['maxSpeed'] = str(i_vehicle.speed_max)
-
-            # fix tractor vType to trailer
-            if l_vattr['vType'] == 'tractor':
-                l_vattr['vType'] = 'trailer'
-
-            l_vattr['type'] = l_vattr.get('vType')
-
-            etree.SubElement(l_trips, 'vType', attrib=l_vattr)
-
-        # add trip for each vehicle
-        for i_vid, i_vehicle in l_vehicles.items():
-            etree.SubElement(l_trips, 'trip', attrib={
-                'id': i_vid,
-                'depart': str(i_vehicle.start_time),
-                'from': 'enter_21start',
-                'to': '21end_exit',
-                'type': i_vid,
-                'departSpeed': 'max',
-            })
-
-        with open(tripfile, 'w') as f_tripxml:
-            f_tripxml.write(
-                defusedxml.lxml.tostring(
-                    l_trips, pretty_print=True, encoding='unicode'
-                )
-            )
+        # parameters speedDev, sigma, and length defined in run config per vehicle type
+        l_vtype_overrides = {
+            i_vtype: {
+                i_key: str(i_vtype_cfg.get(i_key))
+                for i_key in ('speedDev', 'sigma', 'length') if i_vtype_cfg.get(i_key) is not None
+            }
+            for i_vtype, i_vtype_cfg in self.run_config.get('vtypedistribution').items()
+        }
+
+        # stream vTypes and trips straight to the trip file instead of building the whole tree in memory
+        with open(tripfile, 'wb') as f_tripfile:
+            with etree.xmlfile(f_tripfile, encoding='utf-8') as f_tripxml, f_tripxml.element('trips'):
+                f_tripxml.write('\n')
+
+                # create a sumo vehicle_type for each distinct set of vehicle attributes,
+                # i.e. vehicles of same type and maximum speed share one vType
+                l_vtype_ids = {}  # vType attributes -> vType id
+                l_trip_vtypes = {}  # vehicle id -> vType id
+                l_base_vattrs = {}  # vehicle type -> string attributes shared by all vehicles of that type
+                l_colour_strs = {}  # Colour -> colour attribute string
+                for i_vid, i_vehicle in l_vehicles.items():
+                    l_properties = i_vehicle.properties
+
+                    l_base_vattr = l_base_vattrs.get(l_properties['vType'])
+                    if l_base_vattr is None:
+                        # filter for relevant attributes and transform to string
+                        l_base_vattr = {
+                            k: str(v) for k, v in l_properties.items() if k not in _PER_VEHICLE_PROPERTIES
+                        }
+
+                        # override parameters speedDev, desiredSpeed, and length if defined in run config
+                        l_base_vattr.update(l_vtype_overrides[l_base_vattr['vType']])
+
+                        l_base_vattr['speedlimit'] = None
+
+                        # fix tractor vType to trailer
+                        if l_base_vattr['vType'] == 'tractor':
+                            l_base_vattr['vType'] = 'trailer'
+
+                        l_base_vattr['type'] = l_base_vattr.get('vType')
+                        l_base_vattrs[l_properties['vType']] = l_base_vattr
+
+                    # only overwrite the attributes of this very vehicle, keeping the order of attributes
+                    l_vattr = dict(l_base_vattr)
+                    for i_key in _PER_VEHICLE_VTYPE_ATTRIBUTES:
+                        l_vattr[i_key] = str(l_properties[i_key])
+                    l_colour = i_vehicle.colour
+                    l_colour_str = l_colour_strs.get(l_colour)
+                    if l_colour_str is None:
+                        l_colour_str = l_colour_strs[l_colour] = f'{l_colour.red/255.},' \
+                                                                 f'{l_colour.green/255.},' \
+                                                                 f'{l_colour.blue/255.},' \
+                                                                 f'{l_colour.alpha/255.}'
+                    l_vattr['colour'] = l_colour_str
+                    l_vattr['speedlimit'] = l_vattr['maxSpeed'] = str(i_vehicle.speed_max)
+
+                    l_vattr_key = frozenset(l_vattr.items())
+                    l_vtype_id = l_vtype_ids.get(l_vattr_key)
+                    if l_vtype_id is None:
+                        l_vtype_id = l_vtype_ids[l_vattr_key] = f'vtype_{len(l_vtype_ids):0>4}'
+                        l_vattr['id'] = l_vtype_id
+                        f_tripxml.write('  ', etree.Element('vType', attrib=l_vattr), '\n')
+                    l_trip_vtypes[i_vid] = l_vtype_id
+
+                # add trip for each vehicle
+                for i_vid, i_vehicle in l_vehicles.items():
+                    f_tripxml.write('  ', etree.Element('trip', attrib={
+                        'id': i_vid,
+                        'depart': str(i_vehicle.start_time),
+                        'from': 'enter_21start',
+                        'to': '21end_exit',
+                        'type': l_trip_vtypes[i_vid],
+                        'departSpeed': 'max',
+                    }), '\n')
+
+            # end the file with a newline after the closing </trips> tag, like the pretty printed SUMO input files
+            f_tripfile.write(b'\n')
 
         return l_vehicles
 
     # create net xml using netconvert
     def _generate_net_xml(
-            self, nodefile: Path, edgefile: Path, netfile: Path, forcerebuildscenarios=False):
+            self, nodefile: Path, edgefile: Path, netfile: Path,
+            forcerebuildscenarios=False) -> typing.Optional[subprocess.Popen]:
         '''
-        Generate SUMO's net xml.
+        Generate SUMO's net xml by starting netconvert in the background (see `_wait_for_process`).
 
         :param nodefile:
         :param edgefile:
         :param netfile:
         :param forcerebuildscenarios:
+        :return: netconvert process, None if net file is up to date with node and edge file
         '''
 
-        if Path(netfile).exists() and not forcerebuildscenarios:
-            return
+        l_inputhash = self._outdated_inputhash(
+            netfile, (nodefile, edgefile), self._binaries.get('netconvert'), forcerebuildscenarios
+        )
+        if l_inputhash is None:
+            return None
 
-        l_netconvertprocess = subprocess.check_output(
+        return self._start_process(
             [
                 self._binaries.get('netconvert'),
                 f'--node-files={nodefile}',
                 f'--edge-files={edgefile}',
                 f'--output-file={netfile}'
             ],
-            stderr=subprocess.STDOUT,
-            bufsize=-1,
-            close_fds=True
-        )
-        self._log.debug(
-            '%s: %s',
-            self._binaries.get('netconvert'),
-            l_netconvertprocess.decode('utf8').replace('\n', '')
+            (netfile, l_inputhash)
         )
 
     def _generate_route_xml(
-            self, netfile: Path, tripfile: Path, routefile: Path, forcerebuildscenarios=False):
+            self, netfile: Path, tripfile: Path, routefile: Path,
+            forcerebuildscenarios=False) -> typing.Optional[subprocess.Popen]:
         '''
-        Generate SUMO's route xml.
+        Generate SUMO's route xml by starting duarouter in the background (see `_wait_for_process`).
 
         :param netfile:
         :param tripfile:
         :param routefile:
         :param forcerebuildscenarios:
+        :return: duarouter process, None if route file is up to date with net and trip file
         '''
 
-        if Path(routefile).exists() and not forcerebuildscenarios:
-            return
+        l_inputhash = self._outdated_inputhash(
+            routefile, (netfile, tripfile), self._binaries.get('duarouter'), forcerebuildscenarios
+        )
+        if l_inputhash is None:
+            return None
 
-        l_duarouterprocess = subprocess.check_output(
+        return self._start_process(
             [
                 self._binaries.get('duarouter'),
                 '--net-file', netfile,
                 '--route-files', tripfile,
                 '--output-file', routefile
             ],
+            (routefile, l_inputhash)
+        )
+
+    @staticmethod
+    def _outdated_inputhash(
+            outputfile: Path, inputfiles: typing.Tuple[Path, ...], binary,
+            forcerebuildscenarios=False) -> typing.Optional[str]:
+        '''
+        Check whether a SUMO tool's output file is up to date, i.e. exists and was generated by the same tool from
+        inputs with the same contents, as recorded in its input hash file (`<outputfile>.inputhash`).
+
+        :param outputfile: output file of tool
+        :param inputfiles: input files of tool
+        :param binary: tool binary
+        :param forcerebuildscenarios: consider output file outdated in any case
+        :return: None if output file is up to date, otherwise hash of current inputs
+        '''
+
+        l_inputhash = _inputs_hash(inputfiles, binary)
+
+        if forcerebuildscenarios or not outputfile.exists():
+            return l_inputhash
+
+        # read hash file right away instead of checking for its existence first
+        try:
+            l_recordedhash = Path(f'{outputfile}.inputhash').read_text()
+        except FileNotFoundError:
+            return l_inputhash
+
+        return None if l_recordedhash == l_inputhash else l_inputhash
+
+    def _start_process(self, args: typing.List,
+                       inputhash: typing.Optional[typing.Tuple[Path, str]] = None) -> subprocess.Popen:
+        '''
+        Start a SUMO tool, e.g. netconvert, in the background.
+        Its output only gets captured if it gets logged at all.
+
+        :param args: command line of tool
+        :param inputhash: output file and hash of its inputs (see `_outdated_inputhash`),
+                          recorded once the tool finished successfully
+        :return: process
+        '''
+
+        if inputhash is not None:
+            # output is outdated until the tool succeeded
+            try:
+                Path(f'{inputhash[0]}.inputhash').unlink()
+            except FileNotFoundError:
+                pass
+
+        l_process = subprocess.Popen(
+            args,
+            stdout=subprocess.PIPE if self._log.isEnabledFor(logging.DEBUG) else subprocess.DEVNULL,
             stderr=subprocess.STDOUT,
-            bufsize=-1,
+            universal_newlines=True,
             close_fds=True
         )
-        self._log.debug(
-            '%s: %s',
-            self._binaries.get('duarouter'),
-            l_duarouterprocess.decode('utf8').replace('\n', '')
-        )
+
+        if inputhash is not None:
+            self._pending_inputhashes[l_process] = inputhash
+
+        return l_process
+
+    def _wait_for_process(self, process: typing.Optional[subprocess.Popen]):
+        '''
+        Wait for a SUMO tool started by `_start_process` to finish and log its output.
+
+        :param process: process, nothing to wait for if None
+        :raises subprocess.CalledProcessError: if tool failed
+        '''
+
+        if process is None:
+            return
+
+        # stream the tool's output line by line into the debug log instead of buffering all of it in memory
+        if process.stdout is not None:
+            with process.stdout:
+                for i_line in process.stdout:
+                    self._log.debug('%s: %s', process.args[0], i_line.rstrip())
+        process.wait()
+
+        l_inputhash = self._pending_inputhashes.pop(process, None)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, process.args)
+        if l_inputhash is not None:
+            # replace hash file atomically, i.e. it never holds a partial hash
+            l_outputfile, l_hash = l_inputhash
+            l_tmpfile = Path(f'{l_outputfile}.inputhash.tmp')
+            l_tmpfile.write_text(l_hash)
+            l_tmpfile.replace(f'{l_outputfile}.inputhash')
@@ -24,17 +24,13 @@
 '''Main module to run/initialise SUMO scenarios.'''
 # pylint: disable=no-member
 
+import contextlib
+import functools
 import os
 import sys
+from types import MappingProxyType
 import numpy
 
-try:
-    sys.path.append(os.path.join('sumo', 'tools'))
-    sys.path.append(os.path.join(os.environ.get('SUMO_HOME', os.path.join('..', '..')), 'tools'))
-    import sumolib
-except ImportError:  # pragma: no cover
-    raise ImportError('please declare environment variable \'SUMO_HOME\' as the root')
-
 import colmto.common.io
 import colmto.common.statistics
 import colmto.common.log
@@ -43,6 +39,39 @@ from colmto.sumo.sumocfg import SumoConfig
 from colmto.sumo.sumocfg import InitialSorting
 import colmto.sumo.runtime
 
+@functools.lru_cache(maxsize=None)
+def _check_binary(name: str) -> str:
+    '''
+    Locate a SUMO binary via `sumolib.checkBinary`, searching only once per binary name.
+    sumolib only gets imported here, i.e. importing this module does not pay for it.
+
+    :param name: binary name, e.g. netconvert
+    :return: path of binary
+    '''
+    # sumolib is part of SUMO's tools
+    for i_path in (
+            os.path.join('sumo', 'tools'),
+            os.path.join(os.environ.get('SUMO_HOME', os.path.join('..', '..')), 'tools')
+    ):
+        if i_path not in sys.path:
+            sys.path.append(i_path)
+    try:
+        import sumolib  # pylint: disable=import-outside-toplevel
+    except ImportError:  # pragma: no cover
+        raise ImportError('please declare environment variable \'SUMO_HOME\' as the root')
+    return sumolib.checkBinary(name)
+
+
+# arguments of HDF5 dataset creation for each choice of `--hdf5-compression`
+HDF5_COMPRESSION = MappingProxyType(
+    {
+        'gzip9': MappingProxyType({'compression': 'gzip', 'compression_opts': 9, 'fletcher32': True}),
+        'gzip1': MappingProxyType({'compression': 'gzip', 'compression_opts': 1}),
+        'lzf': MappingProxyType({'compression': 'lzf'}),
+        'none': MappingProxyType({})
+    }
+)
+
 
 class SumoSim(object):  # pylint: disable=too-many-instance-attributes
     '''Class for initialising/running SUMO scenarios.'''
@@ -54,27 +83,30 @@ class SumoSim(object):  # pylint: disable=too-many-instance-attributes
         self._args = args
 
         # initialise numpy PRNG
-        self._prng = numpy.random.RandomState()
+        self._prng = numpy.random.default_rng()
 
         self._sumocfg = SumoConfig(
             args,
-            sumolib.checkBinary('netconvert'),
-            sumolib.checkBinary('duarouter')
+            _check_binary('netconvert'),
+            _check_binary('duarouter')
         )
         self._writer = colmto.common.io.Writer(args)
+        self._hdf5_kwargs = HDF5_COMPRESSION[getattr(args, 'hdf5_compression', 'lzf')]
         self._statistics = colmto.common.statistics.Statistics(args)
         self._allscenarioruns = {}  # map scenarios -> runid -> files
         self._runtime = colmto.sumo.runtime.Runtime(
             args,
             self._sumocfg,
-            sumolib.checkBinary('sumo')
+            _check_binary('sumo')
             if self._sumocfg.sumo_run_config.get('headless')
-            else sumolib.checkBinary('sumo-gui')
+            else _check_binary('sumo-gui')
         )
 
     def run_scenario(self, scenario_name):
         '''
         Run given scenario.
+        With CSE enabled, each run starts and closes its own SUMO instance, unless called inside a with statement
+        on the runtime, as `run_scenarios` does, which keeps SUMO running between runs (see `Runtime.run_traci`).
 
         :param scenario_name: Scenario name to look up in cfgs.
         '''
@@ -83,8 +115,13 @@ class SumoSim(object):  # pylint: disable=too-many-instance-attributes
             self._log.error(r'/!\ scenario %s not found in configuration', scenario_name)
             raise Exception
 
+        # scenario, its AADT and run configuration entries stay the same for all sortings and runs
+        l_run_config = self._sumocfg.run_config
         l_scenario = self._sumocfg.generate_scenario(scenario_name)
-        l_vtype_list = self._sumocfg.run_config.get('vtype_list')
+        l_aadt = self._sumocfg.aadt(l_scenario)
+        l_vtype_list = l_run_config.get('vtype_list')
+        l_runs = l_run_config.get('runs')
+        l_workers = max(1, int(self._sumocfg.sumo_run_config.get('workers', 1)))
 
         if scenario_name not in l_vtype_list:
             self._log.debug('Generating new vtype_list')
@@ -92,18 +129,18 @@ class SumoSim(object):  # pylint: disable=too-many-instance-attributes
             l_vtypes, l_vtypefractions = zip(
                 *(
                     (k, v.get('fraction', 0))
-                    for k, v in self._sumocfg.run_config.get('vtypedistribution').items()
+                    for k, v in l_run_config.get('vtypedistribution').items()
                 )
             )
 
             l_numberofvehicles = int(
                 round(
-                    self._sumocfg.aadt(l_scenario) / (24 * 60 * 60) * -numpy.subtract(
-                        *self._sumocfg.run_config.get('simtimeinterval')
+                    l_aadt / (24 * 60 * 60) * -numpy.subtract(
+                        *l_run_config.get('simtimeinterval')
                     )
                 )
-            ) if not self._sumocfg.run_config.get('nbvehicles').get('enabled') \
-                else self._sumocfg.run_config.get('nbvehicles').get('value')
+            ) if not l_run_config.get('nbvehicles').get('enabled') \
+                else l_run_config.get('nbvehicles').get('value')
 
             l_vtype_list[scenario_name] = self._prng.choice(
                 l_vtypes,
@@ -114,76 +151,98 @@ class SumoSim(object):  # pylint: disable=too-many-instance-attributes
         else:
             self._log.debug('Using pre-configured vtype_list')
 
-        for i_initial_sorting in self._sumocfg.run_config.get('initialsortings'):
+        # cse mode: keep results file open for all runs of the scenario instead of reopening it per run
+        with self._writer.open_hdf5(
+                self._args.results_hdf5_file
+                if self._args.results_hdf5_file
+                else self._sumocfg.resultsdir / f'{self._sumocfg.run_prefix}.hdf5'
+        ) if l_run_config.get('cse-enabled') else contextlib.nullcontext() as f_hdf5:
+            for i_initial_sorting in l_run_config.get('initialsortings'):
 
-            for i_run in range(self._sumocfg.run_config.get('runs')):
+                if l_run_config.get('cse-enabled'):
+                    # cse mode: apply cse rules to vehicles and run with TraCI,
+                    # executing up to `workers` runs in parallel before writing their results
+                    for i_first_run in range(0, l_runs, l_workers):
+                        l_chunk = range(i_first_run, min(i_first_run + l_workers, l_runs))
 
-                if self._sumocfg.run_config.get('cse-enabled'):
-                    # cse mode: apply cse rules to vehicles and run with TraCI
+                        l_vehicles = self._runtime.run_many(
+                            self._sumocfg.generate_runs(
+                                l_scenario,
+                                InitialSorting[i_initial_sorting.upper()],
+                                l_chunk,
+                                l_vtype_list.get(scenario_name),
+                                workers=l_workers
+                            ),
+                            [
+                                colmto.cse.cse.SumoCSE(
+                                    self._args
+                                ).add_rules_from_cfg(
+                                    l_run_config.get('rules')
+                                )
+                                for _ in l_chunk
+                            ],
+                            workers=l_workers
+                        )
 
-                    self._writer.write_hdf5(
-                        self._statistics.global_stats(
-                            self._statistics.merge_vehicle_series(
-                                i_run,
-                                self._runtime.run_traci(
-                                    self._sumocfg.generate_run(
-                                        l_scenario,
-                                        InitialSorting[i_initial_sorting.upper()],
+                        for i_run, i_vehicles in zip(l_chunk, l_vehicles):
+                            self._writer.write_hdf5(
+                                self._statistics.global_stats(
+                                    self._statistics.merge_vehicle_series(
                                         i_run,
-                                        l_vtype_list.get(scenario_name)
-                                    ),
-                                    colmto.cse.cse.SumoCSE(
-                                        self._args
-                                    ).add_rules_from_cfg(
-                                        self._sumocfg.run_config.get('rules')
+                                        i_vehicles
                                     )
-                                )
+                                ),
+                                hdf5_file=f_hdf5,
+                                # HDF5 paths are always '/'-separated, independent of the platform
+                                hdf5_base_path=f'{scenario_name}/{l_aadt}/{i_initial_sorting}/{i_run}',
+                                **self._hdf5_kwargs
                             )
-                        ),
-                        hdf5_file=self._args.results_hdf5_file
-                        if self._args.results_hdf5_file
-                        else self._sumocfg.resultsdir / f'{self._sumocfg.run_prefix}.hdf5',
-                        hdf5_base_path=os.path.join(
-                            scenario_name,
-                            str(self._sumocfg.aadt(self._sumocfg.generate_scenario(scenario_name))),
-                            i_initial_sorting,
-                            str(i_run)
-                        ),
-                        compression='gzip',
-                        compression_opts=9,
-                        fletcher32=True
-                    )
+                            self._log_finished_run(scenario_name, l_aadt, i_initial_sorting, i_run)
                 else:
-                    self._runtime.run_standalone(
-                        self._sumocfg.generate_run(
-                            l_scenario,
-                            InitialSorting[i_initial_sorting.upper()],
-                            i_run,
-                            l_vtype_list.get(scenario_name)
-                        )
-                    )
+                    # stand alone mode: run up to `workers` SUMO processes in parallel
+                    for i_run, _ in zip(
+                            range(l_runs),
+                            self._runtime.run_standalone_many(
+                                self._sumocfg.generate_runs(
+                                    l_scenario,
+                                    InitialSorting[i_initial_sorting.upper()],
+                                    range(l_runs),
+                                    l_vtype_list.get(scenario_name),
+                                    workers=l_workers
+                                ),
+                                workers=l_workers
+                            )):
+                        self._log_finished_run(scenario_name, l_aadt, i_initial_sorting, i_run)
 
-                l_aadt = self._sumocfg.scenario_config.get(scenario_name).get(
-                    'parameters'
-                ).get('aadt') if not self._sumocfg.run_config.get('aadt').get('enabled') \
-                    else self._sumocfg.run_config.get('aadt').get('value')
-                self._log.info(
-                    'Scenario %s, AADT %d (%d vph), sorting %s: Finished run %d/%d',
-                    scenario_name,
-                    l_aadt,
-                    int(l_aadt / 24),
-                    i_initial_sorting,
-                    i_run + 1,
-                    self._sumocfg.run_config.get('runs')
-                )
+    def _log_finished_run(self, scenario_name: str, aadt: int, initial_sorting: str, run: int):
+        '''
+        Log that a run of a scenario has finished.
+
+        :param scenario_name: scenario name
+        :param aadt: AADT of scenario
+        :param initial_sorting: initial sorting of run
+        :param run: run number
+        '''
+
+        self._log.info(
+            'Scenario %s, AADT %d (%d vph), sorting %s: Finished run %d/%d',
+            scenario_name,
+            aadt,
+            int(aadt / 24),
+            initial_sorting,
+            run + 1,
+            self._sumocfg.run_config.get('runs')
+        )
 
     def run_scenarios(self):
         '''
         Run all scenarios defined by cfgs/commandline.
         '''
 
-        for i_scenarioname in self._sumocfg.run_config.get('scenarios'):
-            self.run_scenario(i_scenarioname)
+        # keep SUMO running between TraCI runs of all scenarios, closing it afterwards
+        with self._runtime:
+            for i_scenarioname in self._sumocfg.run_config.get('scenarios'):
+                self.run_scenario(i_scenarioname)
 
         # convert vtype_lists from numpy arrays to plain lists
         for i_scenarioname in self._sumocfg.run_config.get('vtype_list').keys():
@@ -25,6 +25,7 @@
 colmto: Test module for common.helper.
 '''
 
+import pickle
 import random
 import unittest
 import numpy
@@ -71,6 +72,13 @@ class HelperTests(unittest.TestCase):
             helper.Colour.map('plasma', 255, 127),
             helper.Colour(red=0.798216, green=0.280197, blue=0.469538, alpha=1.0)
         )
+        self.assertEqual(pickle.loads(pickle.dumps(l_colour)), l_colour)
+        self.assertListEqual(
+            helper.Colour.map_all('plasma', 255, (0, 127, 255, 300), 255.),
+            [helper.Colour.map('plasma', 255, i_value) * 255. for i_value in (0, 127, 255, 300)]
+        )
+        # colourmaps are resampled once per name and size
+        self.assertIs(helper._colourmap('plasma', 255), helper._colourmap('plasma', 255))
 
     def test_range(self):
         '''
@@ -88,6 +96,11 @@ class HelperTests(unittest.TestCase):
         for i_range in range(121, 150):
             with self.subTest(pattern=i_range):
                 self.assertFalse(l_range.contains(i_range))
+        self.assertEqual(pickle.loads(pickle.dumps(l_range)), l_range)
+        self.assertEqual(
+            pickle.loads(pickle.dumps(helper.DissatisfactionRange(0.1, 0.5))),
+            helper.DissatisfactionRange(0.1, 0.5)
+        )
 
     def test_speedrange(self):
         '''
@@ -159,40 +172,62 @@ class HelperTests(unittest.TestCase):
         l_data = [helper.Distribution.LINEAR.next_timestep(lamb=1/3, prev_start_time=2.13) for _ in range(10**6)]
         self.assertAlmostEqual(numpy.mean(l_data)-2.13, 3, 1)
 
+        numpy.testing.assert_allclose(
+            helper.Distribution.LINEAR.timesteps(lamb=1/3, count=4, start_time=2.13),
+            [5.13, 8.13, 11.13, 14.13]
+        )
+        l_data = helper.Distribution.POISSON.timesteps(lamb=1/3, count=10**6)
+        self.assertEqual(len(l_data), 10**6)
+        self.assertTrue((numpy.diff(l_data) >= 0).all())
+        self.assertAlmostEqual(numpy.mean(numpy.diff(l_data)), 3, 1)
+        self.assertEqual(len(helper.Distribution.POISSON.timesteps(lamb=1/3, count=0)), 0)
+
     def test_initialsorting_best(self):
         '''
         Test InitialSorting BEST case
         '''
 
+        l_expected = sorted(self.vehicles, key=lambda i_v: i_v.speed_max)
         helper.InitialSorting.WORST.order(self.vehicles)
         for i in range(len(self.vehicles)-1):
             with self.subTest(pattern=i):
                 self.assertTrue(self.vehicles[i].speed_max <= self.vehicles[i+1].speed_max)
+        self.assertListEqual([id(i_v) for i_v in self.vehicles], [id(i_v) for i_v in l_expected])
 
     def test_initialsorting_worst(self):
         '''
         Test InitialSorting BEST case
         '''
 
+        l_expected = sorted(self.vehicles, key=lambda i_v: i_v.speed_max, reverse=True)
         helper.InitialSorting.BEST.order(self.vehicles)
         for i in range(len(self.vehicles)-1):
             with self.subTest(pattern=i):
                 self.assertTrue(self.vehicles[i].speed_max >= self.vehicles[i+1].speed_max)
+        # vehicles with equal maximum speeds keep their relative order
+        self.assertListEqual([id(i_v) for i_v in self.vehicles], [id(i_v) for i_v in l_expected])
 
     def test_initialsorting_random(self):
         '''
         Test InitialSorting RANDOM case
         '''
 
+        l_vehicles = list(self.vehicles)
         helper.InitialSorting.RANDOM.order(self.vehicles)
+        # same vehicles, just (possibly) in another order
+        self.assertEqual(len(self.vehicles), len(l_vehicles))
+        self.assertSetEqual({id(i_v) for i_v in self.vehicles}, {id(i_v) for i_v in l_vehicles})
 
-    def test_initialsorting_prng(self):
+    def test_initialsorting_members(self):
         '''
-        Test InitialSorting prng error case
+        Test InitialSorting only enumerates sortings, i.e. no PRNG member
         '''
 
-        with self.assertRaises(KeyError):
-            helper.InitialSorting._prng.order(self.vehicles)    # pylint: disable=protected-access
+        self.assertListEqual(
+            [i_sorting.name for i_sorting in helper.InitialSorting],
+            ['BEST', 'RANDOM', 'WORST']
+        )
+        self.assertListEqual([i_distribution.name for i_distribution in helper.Distribution], ['LINEAR', 'POISSON'])
 
     def test_ruleoperatorfromstring(self):
         '''Test colmto.cse.rule.BaseRule.ruleoperator_from_string.'''
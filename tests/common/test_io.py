@@ -26,11 +26,16 @@ colmto: Test module for common.io.
 '''
 
 import json
+import os
+import subprocess
+import sys
 import tempfile
 import logging
 import gzip
 import unittest
+from pathlib import Path
 import h5py
+import numpy
 import yaml
 try:
     from yaml import CSafeDumper as SafeDumper
@@ -143,6 +148,22 @@ class TestIO(unittest.TestCase):
         f_temp_test.close()
 
 
+    def test_reader_read_yaml_cached(self):
+        '''Test read_yaml only parses files again if they changed and never hands out shared data.'''
+
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_yaml_file = Path(f_tmpdir) / 'test.yaml'
+            l_yaml_file.write_text(yaml.dump({'foo': {'bar': 1}}, Dumper=SafeDumper))
+
+            l_reader = colmto.common.io.Reader(None)
+            l_first = l_reader.read_yaml(l_yaml_file)
+            l_first['foo']['bar'] = 23
+            self.assertEqual(l_reader.read_yaml(l_yaml_file), {'foo': {'bar': 1}})
+            self.assertIsNot(l_reader.read_yaml(l_yaml_file), l_reader.read_yaml(l_yaml_file))
+
+            l_yaml_file.write_text(yaml.dump({'foo': {'bar': 42, 'baz': 0}}, Dumper=SafeDumper))
+            self.assertEqual(l_reader.read_yaml(l_yaml_file), {'foo': {'bar': 42, 'baz': 0}})
+
     def test_write_yaml(self):
         '''Test write_yaml method from Writer class.'''
         l_yaml_gold = {
@@ -378,6 +399,40 @@ class TestIO(unittest.TestCase):
         )
 
 
+    def test_force_pyyaml(self):
+        '''test forcing the pure Python YAML loader/dumper via COLMTO_FORCE_PYYAML'''
+        l_code = 'import colmto.common.io, yaml; ' \
+                 'print(colmto.common.io.SafeLoader is yaml.SafeLoader, colmto.common.io.SafeDumper is yaml.SafeDumper)'
+        self.assertEqual(
+            subprocess.run(
+                (sys.executable, '-c', l_code),
+                env={**os.environ, 'COLMTO_FORCE_PYYAML': '1'},
+                stdout=subprocess.PIPE,
+                universal_newlines=True,
+                check=True
+            ).stdout.split(),
+            ['True', 'True']
+        )
+
+    def test_missing_libyaml(self):
+        '''test warning about missing libyaml has no side effects on log handlers and files'''
+        l_code = 'import yaml; del yaml.CSafeLoader; ' \
+                 'import logging, colmto.common.io; ' \
+                 'print(colmto.common.io.SafeLoader is yaml.SafeLoader, ' \
+                 'len(logging.getLogger(colmto.common.io.__name__).handlers))'
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_result = subprocess.run(
+                (sys.executable, '-c', l_code),
+                env={**os.environ, 'HOME': f_tmpdir, 'PYTHONPATH': os.getcwd()},
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                universal_newlines=True,
+                check=True
+            )
+            self.assertEqual(l_result.stdout.split(), ['True', '0'])
+            self.assertIn('yaml.CSafeLoader unavailable', l_result.stderr)
+            self.assertFalse((Path(f_tmpdir) / '.colmto').exists())
+
     def test_write_csv(self):
         '''test write_csv'''
         f_temp_test = tempfile.NamedTemporaryFile()
@@ -397,6 +452,33 @@ class TestIO(unittest.TestCase):
         f_temp_test.close()
 
 
+    def test_write_hdf5_open_file(self):
+        '''test write_hdf5 into a HDF5 file kept open by open_hdf5'''
+
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_hdf5_file = Path(f_tmpdir) / 'test.hdf5'
+            with colmto.common.io.Writer.open_hdf5(l_hdf5_file) as f_hdf5:
+                for i_run in range(3):
+                    colmto.common.io.Writer(None).write_hdf5(
+                        object_dict={
+                            'scalar': {'value': i_run, 'attr': {'info': 'scalar'}},
+                            'array': {'value': numpy.arange(100), 'attr': {'info': 'array'}}
+                        },
+                        hdf5_file=f_hdf5,
+                        hdf5_base_path=f'root/{i_run}',
+                        compression='gzip',
+                        compression_opts=1
+                    )
+                self.assertTrue(f_hdf5.id.valid)
+
+            with h5py.File(l_hdf5_file, 'r') as f_hdf5:
+                for i_run in range(3):
+                    self.assertEqual(f_hdf5[f'root/{i_run}/scalar'][()], i_run)
+                    self.assertIsNone(f_hdf5[f'root/{i_run}/scalar'].compression)
+                    numpy.testing.assert_array_equal(f_hdf5[f'root/{i_run}/array'][()], numpy.arange(100))
+                    # filters of non-scalar datasets survive scalar ones written before them
+                    self.assertEqual(f_hdf5[f'root/{i_run}/array'].compression, 'gzip')
+
     def test_write_hdf5(self):
         '''test write_hdf5'''
         l_obj_dict = {
@@ -86,6 +86,19 @@ class ModelTest(unittest.TestCase):
             )
         )
 
+        # unfairness of each column of a DataFrame at once
+        l_data = pandas.DataFrame(
+            ((1, 150, 0), (2, 250, 1), (numpy.nan, 688, 2), (3, 795, 3), (4, 895, 4), (5, 1099, 5))
+        )
+        numpy.testing.assert_array_equal(
+            colmto.common.model.unfairness(l_data),
+            [colmto.common.model.unfairness(l_data[i_column]) for i_column in l_data]
+        )
+        numpy.testing.assert_array_equal(
+            colmto.common.model.unfairness(l_data.iloc[0:0]),
+            numpy.zeros(3)
+        )
+
 
     def test_dissatisfaction(self):
         '''
@@ -133,6 +146,12 @@ class ModelTest(unittest.TestCase):
             166.5
         )
 
+        # inefficiency of each column of a DataFrame at once
+        numpy.testing.assert_array_equal(
+            colmto.common.model.inefficiency(pandas.DataFrame(((1, 11), (2, -2), (3, 43.5), (4, numpy.nan)))),
+            (10, 52.5)
+        )
+
 
 if __name__ == '__main__':
     unittest.main()
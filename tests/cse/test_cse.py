@@ -89,6 +89,7 @@ class TestCSE(unittest.TestCase):
         self.assertIsInstance(l_sumo_cse.rules, frozenset)
         self.assertIn(l_rule_speed, l_sumo_cse.rules)
         self.assertIn(l_rule_outside_position, l_sumo_cse.rules)
+        self.assertTupleEqual(l_sumo_cse.position_rules, (l_rule_outside_position,))
 
         self.assertIs(l_sumo_cse._traci, None)  # pylint: disable=protected-access
         l_sumo_cse.traci('foo')
@@ -165,6 +166,90 @@ class TestCSE(unittest.TestCase):
 
         self.assertIn(l_rule_speed, l_sumo_cse.rules)
 
+    def test_apply_one_skips_redundant_traci_calls(self):
+        '''
+        Test that apply_one only sends vehicle class and colour changes via TraCI
+        '''
+        l_calls = []
+        l_traci = SimpleNamespace(
+            vehicle=SimpleNamespace(
+                setVehicleClass=lambda vid, vclass: l_calls.append(('setVehicleClass', vid, vclass)),
+                setColor=lambda vid, colour: l_calls.append(('setColor', vid, colour)),
+                changeLane=lambda vid, lane, duration: l_calls.append(('changeLane', vid, lane))
+            )
+        )
+        l_sumo_cse = colmto.cse.cse.SumoCSE().add_rule(
+            colmto.cse.rule.SUMOPositionRule(bounding_box=((0., 0), (64.0, 1)))
+        ).traci(l_traci)
+
+        l_vehicle = colmto.environment.vehicle.SUMOVehicle(
+            environment={'gridlength': 200, 'gridcellwidth': 4}
+        )
+        l_vehicle.sumo_id = 'foo'
+        l_vehicle._properties['position'] = Position(100., 0)  # pylint: disable=protected-access
+
+        l_sumo_cse.apply_one(l_vehicle).apply_one(l_vehicle)
+        # vehicle keeps its initial (allowed) class, i.e. SUMO already knows it
+        self.assertEqual(
+            [i_call[0] for i_call in l_calls],
+            ['setColor']
+        )
+
+        l_calls.clear()
+        l_vehicle._properties['position'] = Position(10., 0)  # pylint: disable=protected-access
+        l_sumo_cse.apply_one(l_vehicle).apply_one(l_vehicle)
+        self.assertEqual(
+            [i_call[0] for i_call in l_calls],
+            ['setColor', 'changeLane', 'setVehicleClass', 'changeLane']
+        )
+        self.assertEqual(l_calls[2][2], colmto.cse.rule.SUMORule.disallowed_class_name())
+
+    def test_apply_after_late_add_subrule(self):
+        '''
+        Test that rules modified after being added to the CSE, e.g. by adding sub-rules, are applied as modified
+        '''
+        l_traci = SimpleNamespace(
+            vehicle=SimpleNamespace(
+                setVehicleClass=lambda vid, vclass: None,
+                setColor=lambda vid, colour: None,
+                changeLane=lambda vid, lane, duration: None
+            )
+        )
+
+        for i_late in (False, True):
+            with self.subTest(late_add_subrule=i_late):
+                l_rule = colmto.cse.rule.ExtendableSUMOMinimalSpeedRule(
+                    minimal_speed=1000.,
+                    subrules=() if i_late else (colmto.cse.rule.SUMOPositionRule(bounding_box=((0., 0), (64.0, 1))),)
+                )
+                l_sumo_cse = colmto.cse.cse.SumoCSE().add_rule(l_rule).traci(l_traci)
+
+                l_vehicle = colmto.environment.vehicle.SUMOVehicle(
+                    environment={'gridlength': 200, 'gridcellwidth': 4}
+                )
+                l_vehicle.sumo_id = 'foo'
+                l_vehicle._properties['position'] = Position(100., 0)  # pylint: disable=protected-access
+                l_sumo_cse.apply_one(l_vehicle)
+
+                if i_late:
+                    # turns the static rule into a dynamic one
+                    l_rule.add_subrule(colmto.cse.rule.SUMOPositionRule(bounding_box=((0., 0), (64.0, 1))))
+
+                l_classes = [l_vehicle.vehicle_class]
+                for i_x in (10., 100.):
+                    l_vehicle._properties['position'] = Position(i_x, 0)  # pylint: disable=protected-access
+                    l_sumo_cse.apply({'foo': l_vehicle})
+                    l_classes.append(l_vehicle.vehicle_class)
+
+                self.assertEqual(
+                    l_classes,
+                    [
+                        colmto.cse.rule.SUMORule.allowed_class_name(),
+                        colmto.cse.rule.SUMORule.disallowed_class_name(),
+                        colmto.cse.rule.SUMORule.allowed_class_name()
+                    ]
+                )
+
     def test_observe_traffic(self):
         '''
         Test observe_traffic method
@@ -631,5 +631,26 @@ class TestRule(unittest.TestCase):
             colmto.cse.rule.SUMOOccupancyRule(occupancy_range=(0, 1.1))
             colmto.cse.rule.SUMOOccupancyRule(occupancy_range=(-1, 0.8))
 
+    def test_static_rules(self):
+        '''
+        Test whether rules report their outcome per vehicle as static (i.e. cacheable) or not
+        '''
+        self.assertTrue(colmto.cse.rule.SUMOUniversalRule().static)
+        self.assertTrue(colmto.cse.rule.SUMONullRule().static)
+        self.assertTrue(colmto.cse.rule.SUMOVTypeRule(vehicle_type='truck').static)
+        self.assertTrue(colmto.cse.rule.SUMOMinimalSpeedRule(minimal_speed=80/3.6).static)
+        self.assertFalse(colmto.cse.rule.SUMOPositionRule().static)
+        self.assertFalse(colmto.cse.rule.SUMOVehicleDissatisfactionRule().static)
+        self.assertFalse(colmto.cse.rule.SUMOOccupancyRule().static)
+
+        l_extendable_speed_rule = colmto.cse.rule.ExtendableSUMOMinimalSpeedRule(
+            minimal_speed=80/3.6,
+            subrules=(colmto.cse.rule.SUMOVTypeRule(vehicle_type='truck'),)
+        )
+        self.assertTrue(l_extendable_speed_rule.static)
+        l_extendable_speed_rule.add_subrule(colmto.cse.rule.SUMOPositionRule())
+        self.assertFalse(l_extendable_speed_rule.static)
+        self.assertFalse(colmto.cse.rule.ExtendableSUMOPositionRule().static)
+
 if __name__ == '__main__':
     unittest.main()
@@ -25,6 +25,7 @@
 colmto: Test module for environment.vehicle.
 '''
 import unittest
+from types import SimpleNamespace
 import colmto.environment.vehicle
 from colmto.common.helper import Behaviour
 from colmto.common.helper import Colour
@@ -134,7 +135,24 @@ class TestVehicle(unittest.TestCase):
         self.assertEqual(l_sumovehicle.vehicle_class, Behaviour.ALLOW.vclass)
         self.assertEqual(l_sumovehicle.colour, Colour(127, 127, 127, 255))
 
+    def test_sync_vehicle_class(self):
+        '''Test that vehicle class is only sent via TraCI if it changed'''
+        l_sumovehicle = colmto.environment.vehicle.SUMOVehicle(
+            environment={'gridlength': 200, 'gridcellwidth': 4}
+        )
+        l_sumovehicle.sumo_id = 'foo'
+        l_calls = []
+        l_traci = SimpleNamespace(
+            vehicle=SimpleNamespace(setVehicleClass=lambda vid, vclass: l_calls.append((vid, vclass)))
+        )
+
+        l_sumovehicle.vehicle_class = Behaviour.ALLOW.vclass
+        self.assertIs(l_sumovehicle.sync_vehicle_class(l_traci), l_sumovehicle)
+        self.assertListEqual(l_calls, [])
 
+        l_sumovehicle.vehicle_class = Behaviour.DENY.vclass
+        l_sumovehicle.sync_vehicle_class(l_traci).sync_vehicle_class(l_traci)
+        self.assertListEqual(l_calls, [('foo', Behaviour.DENY.vclass)])
 
     def test_update(self):
         '''Test update'''
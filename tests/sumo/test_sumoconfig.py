@@ -25,10 +25,16 @@
 colmto: Test module for common.sumo.
 '''
 
+import logging
+import pickle
+import subprocess
 import unittest
 import tempfile
 from pathlib import Path
 
+import lxml.etree as etree
+import numpy
+
 import colmto.sumo.sumocfg
 from colmto.common.helper import InitialSorting
 
@@ -79,6 +85,50 @@ class TestSUMOConfiguration(unittest.TestCase):
                         duarouterbinary=None
                     )
 
+    def test_sumo_configuration_mkdir(self):
+        '''
+        Test SUMOConfig creates directories only once
+        '''
+        with tempfile.NamedTemporaryFile() as f_tmp, tempfile.TemporaryDirectory() as d_tmp:
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=f_tmp.name,
+                    output_dir=Path(d_tmp),
+                    runconfigfile=Path(d_tmp) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(d_tmp) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(d_tmp) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=1,
+                    scenarios=None,
+                    run_prefix='foo',
+                    forcerebuildscenarios=False,
+                    initialsortings=['random'],
+                    cooperation_probability=None,
+                    writefulloccupancies=False
+                ),
+                netconvertbinary=None,
+                duarouterbinary=None
+            )
+            self.assertTrue(l_sumo_config.runsdir.is_dir())
+            self.assertTrue(l_sumo_config.resultsdir.is_dir())
+            self.assertIn(l_sumo_config.sumo_config_dir, l_sumo_config._created_dirs)
+
+            l_rundir = l_sumo_config.runsdir / 'scenario' / 'random' / '0'
+            l_sumo_config._mkdir(l_rundir)
+            self.assertTrue(l_rundir.is_dir())
+            self.assertIn(l_rundir.parent, l_sumo_config._created_dirs)
+
+            # known directories are not touched again
+            l_rundir.rmdir()
+            l_sumo_config._mkdir(l_rundir)
+            self.assertFalse(l_rundir.exists())
+
     def test_sumo_configuration_createvehicledistribution(self):
         '''
         Test SUMOConfig _create_vehicle_distribution
@@ -110,7 +160,9 @@ class TestSUMOConfiguration(unittest.TestCase):
                 duarouterbinary=None
             )
 
-            self.assertDictEqual(l_sumo_config.sumo_run_config, l_sumo_config.run_config.get('sumo'))
+            self.assertDictEqual(dict(l_sumo_config.sumo_run_config), l_sumo_config.run_config.get('sumo'))
+            with self.assertRaises(TypeError):
+                l_sumo_config.sumo_run_config['headless'] = False  # pylint: disable=unsupported-assignment-operation
             l_sumo_config._create_vehicle_distribution(                     # pylint: disable=protected-access
                 vtype_list=('passenger', 'truck', 'tractor', 'passenger'),
                 aadt=8400,
@@ -126,6 +178,298 @@ class TestSUMOConfiguration(unittest.TestCase):
                     scenario_name='NI-B210'
                 )
 
+    def test_sumo_configuration_tripxml(self):
+        '''
+        Test SUMOConfig _generate_trip_xml shares vTypes between vehicles with same attributes
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=1,
+                    scenarios=None,
+                    run_prefix='foo',
+                    forcerebuildscenarios=True,
+                    initialsortings=['random'],
+                    cooperation_probability=None,
+                    writefulloccupancies=False
+                ),
+                netconvertbinary=None,
+                duarouterbinary=None
+            )
+
+            l_tripfile = Path(f_tmpdir) / 'NI-B210.trip.xml'
+            l_vehicles = l_sumo_config._generate_trip_xml(                  # pylint: disable=protected-access
+                {'scenarioname': 'NI-B210'},
+                InitialSorting.BEST,
+                ['passenger'] * 50 + ['truck'] * 50,
+                l_tripfile,
+                forcerebuildscenarios=True
+            )
+
+            self.assertTrue(l_tripfile.read_bytes().endswith(b'</trips>\n'))
+            l_trips = etree.parse(str(l_tripfile)).getroot()
+            l_vtypes = {i_vtype.get('id'): i_vtype for i_vtype in l_trips.iter('vType')}
+            self.assertEqual(
+                len(l_vtypes),
+                len({(i_vehicle.vehicle_type, i_vehicle.speed_max) for i_vehicle in l_vehicles.values()})
+            )
+            self.assertEqual(len(list(l_trips.iter('trip'))), len(l_vehicles))
+            for i_trip in l_trips.iter('trip'):
+                with self.subTest(pattern=i_trip.get('id')):
+                    l_vehicle = l_vehicles[i_trip.get('id')]
+                    self.assertEqual(float(l_vtypes[i_trip.get('type')].get('maxSpeed')), l_vehicle.speed_max)
+                    self.assertEqual(l_vtypes[i_trip.get('type')].get('vType'), l_vehicle.vehicle_type.value)
+
+    def test_sumo_configuration_reuse_run(self):
+        '''
+        Test SUMOConfig generate_run restores vehicles of existing run files instead of creating new ones,
+        unless their configuration changed
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_args = Namespace(
+                loglevel='DEBUG',
+                quiet=False,
+                logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                output_dir=Path(f_tmpdir),
+                runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                freshconfigs=True,
+                headless=True,
+                gui=False,
+                onlyoneotlsegment=True,
+                cse_enabled=True,
+                runs=1,
+                scenarios=None,
+                run_prefix='foo',
+                forcerebuildscenarios=False,
+                initialsortings=['random'],
+                cooperation_probability=None,
+                writefulloccupancies=False
+            )
+            # duarouter stand-in, which just creates the route file (`--output-file`)
+            l_duarouter = Path(f_tmpdir) / 'duarouter'
+            l_duarouter.write_text('#!/bin/sh\ntouch "$6"\n')
+            l_duarouter.chmod(0o755)
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                l_args,
+                netconvertbinary=None,
+                duarouterbinary=str(l_duarouter)
+            )
+            l_netfile = Path(f_tmpdir) / 'NI-B210.net.xml'
+            l_netfile.touch()
+            l_vehiclesfile = l_sumo_config.runsdir / 'NI-B210' / 'random' / '0' / 'NI-B210.vehicles.pickle'
+
+            def generate_run():
+                '''generate run 0, which rebuilds its files only if they are incomplete or outdated'''
+                l_args.forcerebuildscenarios = False
+                return [
+                    (i_vid, i_vehicle.speed_max, i_vehicle.start_time)
+                    for i_vid, i_vehicle in l_sumo_config.generate_run(
+                        {'scenarioname': 'NI-B210', 'netfile': l_netfile, 'settingsfile': None},
+                        InitialSorting.RANDOM, 0, ['passenger'] * 10 + ['truck'] * 10
+                    ).get('vehicles').items()
+                ]
+
+            # no run files of a previous session
+            l_vehicles = generate_run()
+            self.assertTrue(l_args.forcerebuildscenarios)
+
+            # up to date run files of a previous session
+            self.assertListEqual(generate_run(), l_vehicles)
+            self.assertFalse(l_args.forcerebuildscenarios)
+
+            # configuration changed since previous session
+            l_sumo_config._scenario_config['NI-B210'] = {       # pylint: disable=protected-access
+                'parameters': dict(l_sumo_config.scenario_config.get('NI-B210').get('parameters'), aadt=12000.)
+            }
+            l_outdated_vehicles, l_vehicles = l_vehicles, generate_run()
+            self.assertTrue(l_args.forcerebuildscenarios)
+            self.assertNotEqual(l_vehicles, l_outdated_vehicles)
+            self.assertListEqual(generate_run(), l_vehicles)
+
+            # pickled vehicles not written along with their hash
+            with open(l_vehiclesfile, 'wb') as f_vehicles:
+                pickle.dump({}, f_vehicles)
+            self.assertNotEqual(generate_run(), [])
+            self.assertTrue(l_args.forcerebuildscenarios)
+
+    def test_sumo_configuration_generate_runs(self):
+        '''
+        Test SUMOConfig generate_runs draws the same vehicle speeds independent of the number of workers
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=True,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=2,
+                    scenarios=None,
+                    run_prefix='foo',
+                    forcerebuildscenarios=True,
+                    initialsortings=['random'],
+                    cooperation_probability=None,
+                    writefulloccupancies=False
+                ),
+                netconvertbinary=None,
+                duarouterbinary='true'
+            )
+            l_netfile = Path(f_tmpdir) / 'NI-B210.net.xml'
+            l_netfile.touch()
+            l_sumo_config._run_config['vtypedistribution'] = dict(      # pylint: disable=protected-access
+                l_sumo_config.run_config.get('vtypedistribution'),
+                passenger=dict(
+                    l_sumo_config.run_config.get('vtypedistribution').get('passenger'),
+                    desiredSpeeds=[10., 15., 20., 25.]
+                )
+            )
+
+            def generate_runs(run_numbers_list, workers):
+                '''generate runs with a fresh PRNG of the same seed, one call per run numbers'''
+                l_sumo_config._prng = numpy.random.default_rng(42)      # pylint: disable=protected-access
+                return [
+                    sorted(i_vehicle.speed_max for i_vehicle in i_run_config.get('vehicles').values())
+                    for i_run_numbers in run_numbers_list
+                    for i_run_config in l_sumo_config.generate_runs(
+                        {'scenarioname': 'NI-B210', 'netfile': l_netfile, 'settingsfile': None},
+                        InitialSorting.RANDOM, i_run_numbers, ['passenger'] * 10 + ['truck'] * 10,
+                        workers=workers
+                    )
+                ]
+
+            l_parallel = generate_runs([range(2)], workers=2)
+            # the workers log their runs
+            self.assertEqual((Path(f_tmpdir) / 'colmto.log').read_text().count('Generating run '), 2)
+            self.assertNotEqual(l_parallel[0], l_parallel[1])
+            self.assertListEqual(generate_runs([range(2)], workers=1), l_parallel)
+            self.assertListEqual(generate_runs([range(1), range(1, 2)], workers=1), l_parallel)
+
+    def test_sumo_configuration_inputhash(self):
+        '''
+        Test SUMOConfig considers outputs of SUMO tools up to date only if their inputs did not change
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=1,
+                    scenarios=None,
+                    run_prefix='foo',
+                    forcerebuildscenarios=False,
+                    initialsortings=['random'],
+                    cooperation_probability=None,
+                    writefulloccupancies=False
+                ),
+                netconvertbinary=None,
+                duarouterbinary=None
+            )
+            l_input = Path(f_tmpdir) / 'input.xml'
+            l_input.write_text('<input/>')
+            l_output = Path(f_tmpdir) / 'output.xml'
+
+            # tool succeeded: hash of its inputs gets recorded
+            l_inputhash = l_sumo_config._outdated_inputhash(l_output, (l_input,), 'true')  # pylint: disable=protected-access
+            self.assertIsNotNone(l_inputhash)
+            l_sumo_config._wait_for_process(                                                # pylint: disable=protected-access
+                l_sumo_config._start_process(['true'], (l_output, l_inputhash))             # pylint: disable=protected-access
+            )
+            self.assertEqual(Path(f'{l_output}.inputhash').read_text(), l_inputhash)
+
+            # missing output, changed inputs, other tool or forced rebuild -> outdated
+            self.assertIsNotNone(l_sumo_config._outdated_inputhash(l_output, (l_input,), 'true'))  # pylint: disable=protected-access
+            l_output.touch()
+            self.assertIsNone(l_sumo_config._outdated_inputhash(l_output, (l_input,), 'true'))  # pylint: disable=protected-access
+            self.assertIsNotNone(
+                l_sumo_config._outdated_inputhash(l_output, (l_input,), 'true', forcerebuildscenarios=True)  # pylint: disable=protected-access
+            )
+            self.assertIsNotNone(l_sumo_config._outdated_inputhash(l_output, (l_input,), 'false'))  # pylint: disable=protected-access
+            l_input.write_text('<input changed="1"/>')
+            self.assertIsNotNone(l_sumo_config._outdated_inputhash(l_output, (l_input,), 'true'))  # pylint: disable=protected-access
+
+            # tool failed: no hash recorded
+            with self.assertRaises(subprocess.CalledProcessError):
+                l_sumo_config._wait_for_process(                                            # pylint: disable=protected-access
+                    l_sumo_config._start_process(['false'], (l_output, l_inputhash))        # pylint: disable=protected-access
+                )
+            self.assertFalse(Path(f'{l_output}.inputhash').exists())
+
+    def test_sumo_configuration_tool_output(self):
+        '''
+        Test SUMOConfig logs the output of SUMO tools line by line
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumo_config = colmto.sumo.sumocfg.SumoConfig(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=1,
+                    scenarios=None,
+                    run_prefix='foo',
+                    forcerebuildscenarios=False,
+                    initialsortings=['random'],
+                    cooperation_probability=None,
+                    writefulloccupancies=False
+                ),
+                netconvertbinary=None,
+                duarouterbinary=None
+            )
+            with self.assertLogs('colmto.sumo.sumocfg', level=logging.DEBUG) as l_logs:
+                l_sumo_config._wait_for_process(                                        # pylint: disable=protected-access
+                    l_sumo_config._start_process(['sh', '-c', 'echo foo; echo bar'])    # pylint: disable=protected-access
+                )
+            self.assertListEqual(
+                l_logs.output[-2:],
+                ['DEBUG:colmto.sumo.sumocfg:sh: foo', 'DEBUG:colmto.sumo.sumocfg:sh: bar']
+            )
+
+            with self.assertRaises(subprocess.CalledProcessError):
+                l_sumo_config._wait_for_process(                                        # pylint: disable=protected-access
+                    l_sumo_config._start_process(['sh', '-c', 'echo failed; exit 1'])   # pylint: disable=protected-access
+                )
+
     def test_sumo_configuration_aadt(self):
         '''
         Test SUMOConfig aadt
@@ -158,6 +502,36 @@ class TestSUMOConfiguration(unittest.TestCase):
             )
             self.assertEqual(l_sumo_config.aadt({'scenarioname': 'NI-B210'}), 13000.0)
 
+    def test_sumo_configuration_configxml(self):
+        '''
+        Test SUMOConfig _generate_config_xml writes well-formed XML with escaped file names
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_config_files = {
+                'configfile': Path(f_tmpdir) / 'run.sumo.cfg',
+                'netfile': Path(f_tmpdir) / 'a&b "net".xml',
+                'routefile': Path(f_tmpdir) / '<route>.xml',
+                'settingsfile': Path(f_tmpdir) / 'settings.xml'
+            }
+            colmto.sumo.sumocfg.SumoConfig._generate_config_xml(    # pylint: disable=protected-access
+                l_config_files, [0, 100], forcerebuildscenarios=True
+            )
+            l_configuration = etree.parse(str(l_config_files.get('configfile'))).getroot()
+            self.assertEqual(
+                l_configuration.find('input/net-file').get('value'), str(l_config_files.get('netfile'))
+            )
+            self.assertEqual(
+                l_configuration.find('input/route-files').get('value'), str(l_config_files.get('routefile'))
+            )
+            self.assertEqual(
+                l_configuration.find('input/gui-settings-file').get('value'), str(l_config_files.get('settingsfile'))
+            )
+            self.assertEqual(l_configuration.find('time/begin').get('value'), '0')
+            with self.assertRaises(TypeError):
+                colmto.sumo.sumocfg.SumoConfig._generate_config_xml(l_config_files, (0, 100))  # pylint: disable=protected-access
+            with self.assertRaises(ValueError):
+                colmto.sumo.sumocfg.SumoConfig._generate_config_xml(l_config_files, [0])  # pylint: disable=protected-access
+
     @staticmethod
     def test_sumo_configuration_settingsxml():
         '''
@@ -286,6 +660,35 @@ class TestSUMOConfiguration(unittest.TestCase):
             l_sumo_config._generate_edge_xml('NI-B210', l_sumo_config.scenario_config.get('NI-B210'), f_tmp.name, forcerebuildscenarios=True)  # pylint: disable=protected-access
             l_sumo_config._generate_edge_xml('NI-B210', l_sumo_config.scenario_config.get('NI-B210'), f_tmp.name, forcerebuildscenarios=False) # pylint: disable=protected-access
 
+    def test_sumo_configuration_switches(self):
+        '''
+        Test SUMOConfig _generate_switches alternately adds and removes the OTL
+        '''
+        for i_onlyoneotlsegment in (False, True):
+            for i_switchpositions in (None, [0, 100, 200, 300]):
+                with self.subTest(pattern=(i_onlyoneotlsegment, i_switchpositions)):
+                    l_edge = etree.Element('edge')
+                    l_scenario_config = {'parameters': {'length': 1000, 'switches': 3, 'speedlimit': 27.7}}
+                    if i_switchpositions is not None:
+                        l_scenario_config['parameters']['switchpositions'] = i_switchpositions
+                    colmto.sumo.sumocfg.SumoConfig._generate_switches(  # pylint: disable=protected-access
+                        Namespace(
+                            _log=logging.getLogger(__name__),
+                            _run_config={'onlyoneotlsegment': i_onlyoneotlsegment}
+                        ),
+                        l_edge,
+                        l_scenario_config
+                    )
+                    l_positions = [0, 100, 200, 300] if i_switchpositions is not None else [0, 250, 500, 750]
+                    if i_onlyoneotlsegment:
+                        l_positions = l_positions[:2]
+                    self.assertListEqual(
+                        [(i_split.get('pos'), i_split.get('lanes'), i_split.get('speed')) for i_split in l_edge],
+                        [(str(i_pos), ('0 1', '0')[i % 2], '27.7') for i, i_pos in enumerate(l_positions)]
+                    )
+                    if i_switchpositions is None:
+                        self.assertListEqual(l_scenario_config['parameters']['switchpositions'], l_positions)
+
 
 if __name__ == '__main__':
     unittest.main()
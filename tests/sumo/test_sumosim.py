@@ -25,9 +25,13 @@
 colmto: Test module for common.sumo.
 '''
 
+import logging
+import pickle
 import unittest
+import unittest.mock
 import tempfile
 from pathlib import Path
+from types import SimpleNamespace
 import os
 import sys
 
@@ -84,6 +88,15 @@ class TestSumoSim(unittest.TestCase):
                 writefulloccupancies=False
             )
             self.assertEqual(colmto.sumo.sumosim.SumoSim(l_args)._args, l_args)  # pylint: disable=protected-access
+            # HDF5 compression defaults to lzf if not given
+            self.assertIs(
+                colmto.sumo.sumosim.SumoSim(l_args)._hdf5_kwargs,                # pylint: disable=protected-access
+                colmto.sumo.sumosim.HDF5_COMPRESSION['lzf']
+            )
+            # binaries are located only once
+            l_misses = colmto.sumo.sumosim._check_binary.cache_info().misses  # pylint: disable=protected-access
+            colmto.sumo.sumosim.SumoSim(l_args)
+            self.assertEqual(colmto.sumo.sumosim._check_binary.cache_info().misses, l_misses)  # pylint: disable=protected-access
 
     @staticmethod
     @unittest.skipUnless(
@@ -151,6 +164,50 @@ class TestSumoSim(unittest.TestCase):
                 )
             ).run_scenarios()
 
+    @unittest.skipUnless(
+        Path(f"{os.environ.get('SUMO_HOME','sumo')}/tools/sumolib").is_dir(),
+        f"can't find sumolib at {os.environ.get('SUMO_HOME','sumo')}/tools/")
+    def test_sumosim_runscenario_parallel(self):
+        '''
+        Test SumoSim.runscenarios() running stand alone runs in parallel
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumosim = colmto.sumo.sumosim.SumoSim(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=False,
+                    runs=2,
+                    scenarios=['NI-B210'],
+                    run_prefix='foo',
+                    forcerebuildscenarios=True,
+                    initialsortings=['random'],
+                    cooperation_probability=0.5,
+                    writefulloccupancies=False
+                )
+            )
+            l_sumosim._sumocfg._run_config['sumo'] = dict(     # pylint: disable=protected-access
+                l_sumosim._sumocfg.run_config.get('sumo'), workers=2   # pylint: disable=protected-access
+            )
+            l_sumosim.run_scenarios()
+            for i_run in range(2):
+                with self.subTest(pattern=i_run):
+                    self.assertTrue(
+                        (
+                            l_sumosim._sumocfg.resultsdir       # pylint: disable=protected-access
+                            / 'NI-B210' / 'random' / str(i_run) / 'NI-B210.fcd-output.xml'
+                        ).is_file()
+                    )
+
     @unittest.skipUnless(
         Path(f"{os.environ.get('SUMO_HOME','sumo')}/tools/sumolib").is_dir(),
         f"can't find sumolib at {os.environ.get('SUMO_HOME','sumo')}/tools/")
@@ -219,12 +276,122 @@ class TestSumoSim(unittest.TestCase):
                 )
             ).run_scenarios()
 
+    @unittest.skipUnless(
+        Path(f"{os.environ.get('SUMO_HOME','sumo')}/tools/sumolib").is_dir(),
+        f"can't find sumolib at {os.environ.get('SUMO_HOME','sumo')}/tools/")
+    def test_sumosim_runscenarios_cse_parallel(self):
+        '''
+        Test SumoSim.runscenarios() running CSE runs in parallel worker processes
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumosim = colmto.sumo.sumosim.SumoSim(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=True,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=2,
+                    scenarios=['NI-B210'],
+                    run_prefix='foo',
+                    forcerebuildscenarios=True,
+                    results_hdf5_file=Path(f_tmpdir) / 'results.hdf5',
+                    initialsortings=['random'],
+                    cooperation_probability=0.5,
+                    writefulloccupancies=False
+                )
+            )
+            l_sumosim._sumocfg._run_config['sumo'] = dict(     # pylint: disable=protected-access
+                l_sumosim._sumocfg.run_config.get('sumo'), workers=2   # pylint: disable=protected-access
+            )
+            # a few vehicles per run suffice, i.e. draw a new vehicle type list
+            l_sumosim._sumocfg._run_config['nbvehicles'] = {    # pylint: disable=protected-access
+                'enabled': True, 'value': 10
+            }
+            l_sumosim._sumocfg._run_config['vtype_list'] = {}   # pylint: disable=protected-access
+            l_sumosim.run_scenarios()
+            self.assertTrue((Path(f_tmpdir) / 'results.hdf5').is_file())
+            # the workers log each of their TraCI runs
+            self.assertEqual(
+                (Path(f_tmpdir) / 'colmto.log').read_text().count('with rules'),
+                2
+            )
+
+
+    @unittest.skipUnless(
+        Path(f"{os.environ.get('SUMO_HOME','sumo')}/tools/sumolib").is_dir(),
+        f"can't find sumolib at {os.environ.get('SUMO_HOME','sumo')}/tools/")
+    def test_sumosim_runscenarios_cse_reload(self):
+        '''
+        Test SumoSim.runscenarios() with CSE starts SUMO once, reloads it for later runs and closes it at the end
+        '''
+        with tempfile.TemporaryDirectory() as f_tmpdir:
+            l_sumosim = colmto.sumo.sumosim.SumoSim(
+                Namespace(
+                    loglevel='DEBUG',
+                    quiet=True,
+                    logfile=str(Path(f_tmpdir) / 'colmto.log'),
+                    output_dir=Path(f_tmpdir),
+                    runconfigfile=Path(f_tmpdir) / 'runconfig.yaml',
+                    scenarioconfigfile=Path(f_tmpdir) / 'scenarioconfig.yaml',
+                    vtypesconfigfile=Path(f_tmpdir) / 'vtypesconfig.yaml',
+                    freshconfigs=True,
+                    headless=True,
+                    gui=False,
+                    onlyoneotlsegment=True,
+                    cse_enabled=True,
+                    runs=3,
+                    scenarios=['NI-B210'],
+                    run_prefix='foo',
+                    forcerebuildscenarios=True,
+                    results_hdf5_file=Path(f_tmpdir) / 'results.hdf5',
+                    initialsortings=['random'],
+                    cooperation_probability=0.5,
+                    writefulloccupancies=False
+                )
+            )
+            # consecutive runs in this process, with a few vehicles each of a new vehicle type list
+            l_sumosim._sumocfg._run_config['sumo'] = dict(     # pylint: disable=protected-access
+                l_sumosim._sumocfg.run_config.get('sumo'), workers=1   # pylint: disable=protected-access
+            )
+            l_sumosim._sumocfg._run_config['nbvehicles'] = {    # pylint: disable=protected-access
+                'enabled': True, 'value': 10
+            }
+            l_sumosim._sumocfg._run_config['vtype_list'] = {}   # pylint: disable=protected-access
+            l_runtime = l_sumosim._runtime                                          # pylint: disable=protected-access
+
+            def sumo_log(logs):
+                '''starts, reloads and closes of SUMO in log output'''
+                return [
+                    i_line.split(' sumo process')[0].rsplit(':', 1)[-1]
+                    for i_line in logs.output if ' sumo process' in i_line
+                ]
+
+            with self.assertLogs('colmto.sumo.runtime', level=logging.DEBUG) as l_logs:
+                l_sumosim.run_scenarios()
+            self.assertListEqual(sumo_log(l_logs), ['starting', 'reloading', 'reloading', 'closing'])
+            self.assertIsNone(l_runtime._traci_backend)                             # pylint: disable=protected-access
+
+            # failing after the first run closes SUMO on leaving the with statement
+            l_sumosim._writer.write_hdf5 = unittest.mock.Mock(side_effect=OSError)  # pylint: disable=protected-access
+            with self.assertLogs('colmto.sumo.runtime', level=logging.DEBUG) as l_logs:
+                with self.assertRaises(OSError):
+                    l_sumosim.run_scenarios()
+            self.assertListEqual(sumo_log(l_logs), ['starting', 'closing'])
+            self.assertIsNone(l_runtime._traci_backend)                             # pylint: disable=protected-access
 
     def test_runtime(self):
         '''
         Test runtime
         '''
-        with self.assertRaises(AttributeError):
+        with self.assertRaises(AssertionError):
             with tempfile.NamedTemporaryFile() as f_tmp:
                 colmto.sumo.runtime.Runtime(
                     args=Namespace(
@@ -236,6 +403,38 @@ class TestSumoSim(unittest.TestCase):
                     sumo_binary=None
                 ).run_traci({}, 'foo')
 
+    def test_runtime_lifecycle(self):
+        '''
+        Test SUMO is only kept running between TraCI runs inside a with statement on the runtime
+        '''
+        with tempfile.NamedTemporaryFile() as f_tmp:
+            l_runtime = colmto.sumo.runtime.Runtime(
+                args=Namespace(
+                    loglevel='DEBUG',
+                    quiet=False,
+                    logfile=f_tmp.name
+                ),
+                sumo_config=None,
+                sumo_binary=None
+            )
+            l_closed = []
+            l_backend = SimpleNamespace(__name__='backend', close=lambda: l_closed.append(True))
+
+            with l_runtime as l_kept_running:
+                self.assertIs(l_kept_running, l_runtime)
+                l_runtime._traci_backend = l_backend                  # pylint: disable=protected-access
+                # workers never keep SUMO running
+                self.assertFalse(pickle.loads(pickle.dumps(l_runtime))._keep_running)  # pylint: disable=protected-access
+                self.assertEqual(l_closed, [])
+            self.assertEqual(l_closed, [True])
+            self.assertIsNone(l_runtime._traci_backend)               # pylint: disable=protected-access
+
+            # failed runs close SUMO
+            l_runtime._traci_backend = l_backend                      # pylint: disable=protected-access
+            with self.assertRaises(AssertionError):
+                l_runtime.run_traci({}, 'foo')
+            self.assertEqual(l_closed, [True, True])
+
 
 if __name__ == '__main__':
     unittest.main()